@@ -0,0 +1,45 @@
+import os
+from pathlib import Path
+
+CATALOG_NAME: str = "benchmark"
+
+DEFAULT_ENVIRONMENT_VARIABLES: dict[str, str] = {
+    "STUDY_PROGRAMS_DATASET_NAME": "study_programs",
+    "CURRICULA_DATASET_NAME": "curricula",
+    "COURSES_DATASET_NAME": "courses",
+    "REQUISITES_DATASET_NAME": "requisites",
+    "PROFESSORS_DATASET_NAME": "professors",
+    "OFFERS_DATASET_NAME": "offers",
+    "INCLUDES_DATASET_NAME": "includes",
+    "REQUIRES_DATASET_NAME": "requires",
+    "SATISFIES_DATASET_NAME": "satisfies",
+    "TEACHES_DATASET_NAME": "teaches",
+    "FILE_IO_TYPE": "local",
+    "ICEBERG_NAMESPACE": "processed",
+    "DATABASE_HOST_NAME": "localhost",
+    "DATABASE_NAME": "neo4j",
+    "DATABASE_USER": "neo4j",
+    "DATABASE_PASSWORD": "neo4j",
+    "DATABASE_PORT": "7687",
+    "DATABASE_CONNECTION_ACQUISITION_TIMEOUT": "60",
+    "DATABASE_CONNECTION_TIMEOUT": "30",
+    "DATABASE_MAX_CONNECTION_LIFETIME": "3600",
+    "DATABASE_MAX_CONNECTION_POOL_SIZE": "20",
+    "DATABASE_MAX_TRANSACTION_RETRY_TIME": "30",
+    "DATABASE_RETRY_COUNT": "10",
+    "DATABASE_RETRY_MULTIPLIER_IN_SECONDS": "1",
+    "DATABASE_RETRY_EXPONENT_BASE": "2",
+}
+
+
+def configure_environment(work_directory: Path):
+    # src reads its configuration at import time, so this has to run before anything from src is imported
+    work_directory.mkdir(parents=True, exist_ok=True)
+    for name, value in DEFAULT_ENVIRONMENT_VARIABLES.items():
+        os.environ.setdefault(name, value)
+    os.environ["ICEBERG_CATALOG_NAME"] = CATALOG_NAME
+    os.environ["LOCAL_ICEBERG_LAKEHOUSE_FILE_PATH"] = str(work_directory / "warehouse")
+    os.environ["INGESTION_STATE_FILE_PATH"] = str(work_directory / "ingestion_state.json")
+    os.environ[f"PYICEBERG_CATALOG__{CATALOG_NAME.upper()}__TYPE"] = "sql"
+    os.environ[f"PYICEBERG_CATALOG__{CATALOG_NAME.upper()}__URI"] = f"sqlite:///{work_directory / 'catalog.db'}"
+    os.environ[f"PYICEBERG_CATALOG__{CATALOG_NAME.upper()}__WAREHOUSE"] = (work_directory / "warehouse").as_uri()
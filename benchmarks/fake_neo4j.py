@@ -0,0 +1,67 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Any
+
+from src.storage import Neo4jBackend, Neo4jClient
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    base_latency_in_seconds: float = 0.002
+    row_latency_in_seconds: float = 0.00001
+    jitter: float = 0.1
+
+    def latency(self, number_of_rows: int) -> float:
+        latency: float = self.base_latency_in_seconds + self.row_latency_in_seconds * number_of_rows
+        return latency * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class FakeNeo4jBackend(Neo4jBackend):
+
+    def __init__(self, latency_model: LatencyModel):
+        self.latency_model: LatencyModel = latency_model
+        self.transactions: int = 0
+        self.rows: int = 0
+
+    @staticmethod
+    def count_rows(params: dict[str, Any] | None) -> int:
+        if not params:
+            return 0
+        if "rows" in params:
+            return len(params["rows"])
+        return max((len(value) for value in params.values() if isinstance(value, list)), default=0)
+
+    async def execute(self, cypher: str, params: dict[str, Any] | None = None) -> None:
+        number_of_rows: int = self.count_rows(params)
+        await asyncio.sleep(self.latency_model.latency(number_of_rows))
+        self.transactions += 1
+        self.rows += number_of_rows
+
+    async def execute_auto_commit(self, cypher: str, params: dict[str, Any] | None = None) -> None:
+        await self.execute(cypher, params)
+
+    async def query(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        await asyncio.sleep(self.latency_model.latency(0))
+        return []
+
+    async def execute_system(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        return []
+
+    async def use_database(self, name: str):
+        pass
+
+    async def drop_constraints(self):
+        pass
+
+    async def drop_indexes(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @staticmethod
+    def install(latency_model: LatencyModel) -> "FakeNeo4jBackend":
+        backend: FakeNeo4jBackend = FakeNeo4jBackend(latency_model)
+        Neo4jClient().client = backend
+        return backend
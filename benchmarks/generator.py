@@ -0,0 +1,89 @@
+import logging
+import random
+import uuid
+
+import pyarrow as pa
+from pyiceberg.catalog import Catalog, load_catalog
+from pyiceberg.exceptions import NamespaceAlreadyExistsError, NoSuchTableError
+
+from src.configurations import NodeConfiguration, RelationshipConfiguration, StorageConfiguration, STUDY_PROGRAMS, \
+    COURSES, PROFESSORS, CURRICULA, REQUISITES, OFFERS, INCLUDES, REQUIRES, SATISFIES, TEACHES
+
+# approximate row counts of the FCSE undergraduate study programs, the 1x scale of the benchmarks
+FCSE_NODE_ROW_COUNTS: list[tuple[NodeConfiguration, int]] = [
+    (STUDY_PROGRAMS, 30),
+    (COURSES, 600),
+    (PROFESSORS, 150),
+    (CURRICULA, 3000),
+    (REQUISITES, 500),
+]
+FCSE_RELATIONSHIP_ROW_COUNTS: list[tuple[RelationshipConfiguration, int]] = [
+    (OFFERS, 3000),
+    (INCLUDES, 3000),
+    (REQUIRES, 500),
+    (SATISFIES, 1000),
+    (TEACHES, 1500),
+]
+INTEGER_COLUMN_KEYWORDS: tuple[str, ...] = ("semester", "year", "duration", "number", "level")
+
+
+class SyntheticDataGenerator:
+    def __init__(self, scale: int, seed: int = 42):
+        self.scale: int = scale
+        self.random: random.Random = random.Random(seed)
+        self.catalog: Catalog = load_catalog(StorageConfiguration.ICEBERG_CATALOG_NAME)
+
+    def generate(self) -> dict[str, int]:
+        try:
+            self.catalog.create_namespace(StorageConfiguration.ICEBERG_NAMESPACE)
+        except NamespaceAlreadyExistsError:
+            pass
+
+        row_counts: dict[str, int] = {}
+        node_ids: dict[str, list[str]] = {}
+        for configuration, row_count in FCSE_NODE_ROW_COUNTS:
+            table: pa.Table = self.generate_node_table(configuration, row_count * self.scale)
+            node_ids[configuration.label] = table[configuration.input_index_column()].to_pylist()
+            row_counts[configuration.dataset_name] = self.write(configuration.dataset_name, table)
+        for configuration, row_count in FCSE_RELATIONSHIP_ROW_COUNTS:
+            table: pa.Table = self.generate_relationship_table(configuration, row_count * self.scale, node_ids)
+            row_counts[configuration.dataset_name] = self.write(configuration.dataset_name, table)
+        return row_counts
+
+    def generate_ids(self, number_of_rows: int) -> list[str]:
+        return [str(uuid.UUID(int=self.random.getrandbits(128))) for _ in range(number_of_rows)]
+
+    def generate_node_table(self, configuration: NodeConfiguration, number_of_rows: int) -> pa.Table:
+        columns: dict[str, list[str | int]] = {}
+        for column in configuration.input_columns():
+            if column == configuration.input_index_column():
+                columns[column] = self.generate_ids(number_of_rows)
+            elif any(keyword in column for keyword in INTEGER_COLUMN_KEYWORDS):
+                columns[column] = [self.random.randint(1, 8) for _ in range(number_of_rows)]
+            else:
+                columns[column] = [f"{column}-{self.random.getrandbits(32):08x}" for _ in range(number_of_rows)]
+        return pa.table(columns)
+
+    def generate_relationship_table(self, configuration: RelationshipConfiguration, number_of_rows: int,
+                                    node_ids: dict[str, list[str]]) -> pa.Table:
+        source_ids: list[str] = node_ids[configuration.source_node.label]
+        destination_ids: list[str] = node_ids[configuration.destination_node.label]
+        columns: dict[str, list[str]] = {}
+        for column in configuration.input_columns():
+            if column == configuration.source_node.labeled_index_column():
+                columns[column] = self.random.choices(source_ids, k=number_of_rows)
+            elif column == configuration.destination_node.labeled_index_column():
+                columns[column] = self.random.choices(destination_ids, k=number_of_rows)
+            else:
+                columns[column] = self.generate_ids(number_of_rows)
+        return pa.table(columns)
+
+    def write(self, dataset_name: str, table: pa.Table) -> int:
+        table_identifier: str = f"{StorageConfiguration.ICEBERG_NAMESPACE}.{dataset_name}"
+        try:
+            self.catalog.drop_table(table_identifier)
+        except NoSuchTableError:
+            pass
+        self.catalog.create_table(table_identifier, table.schema).append(table)
+        logging.info(f"Generated {table.num_rows} rows of {table_identifier}")
+        return table.num_rows
@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+from benchmarks.environment import configure_environment
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion pipelines against synthetic data "
+                                                 "and an in-process fake Neo4j.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="multiples of the FCSE dataset size to benchmark")
+    parser.add_argument("--base-latency", type=float, default=0.002,
+                        help="fake Neo4j latency of every transaction in seconds")
+    parser.add_argument("--row-latency", type=float, default=0.00001,
+                        help="fake Neo4j latency of every written row in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1,
+                        help="relative random deviation of the fake Neo4j latency")
+    parser.add_argument("--work-directory", type=Path, default=None,
+                        help="directory of the generated Iceberg catalog and warehouse (default: a temporary one)")
+    parser.add_argument("--output", type=Path, default=None, help="JSON file to write the results to")
+    return parser.parse_args()
+
+
+async def main():
+    arguments: argparse.Namespace = parse_arguments()
+    work_directory: Path = arguments.work_directory or Path(tempfile.mkdtemp(prefix="ingestor-benchmarks-"))
+    configure_environment(work_directory)
+
+    from benchmarks.fake_neo4j import LatencyModel
+    from benchmarks.suite import StageResult, benchmark_scale, format_results, serialize_results
+
+    latency_model: LatencyModel = LatencyModel(
+        base_latency_in_seconds=arguments.base_latency,
+        row_latency_in_seconds=arguments.row_latency,
+        jitter=arguments.jitter
+    )
+    results: list[StageResult] = []
+    for scale in arguments.scales:
+        results.extend(await benchmark_scale(scale, latency_model))
+
+    print(format_results(results))
+    if arguments.output is not None:
+        arguments.output.write_text(json.dumps(serialize_results(results), indent=2))
+        logging.info(f"Wrote benchmark results to {arguments.output}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
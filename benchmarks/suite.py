@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Any, Callable
+
+import pyarrow as pa
+
+from benchmarks.fake_neo4j import FakeNeo4jBackend, LatencyModel
+from benchmarks.generator import SyntheticDataGenerator
+from src.ingestion import AdaptiveTransactionSizeController
+from src.integrity import DataIntegrityMixin, NodeUidRegistry
+from src.patterns.builder.pipeline import Pipeline
+from src.pipeline.courses_pipeline import courses_pipeline
+from src.pipeline.curricula_pipeline import curricula_pipeline
+from src.pipeline.includes_pipeline import includes_pipeline
+from src.pipeline.offers_pipeline import offers_pipeline
+from src.pipeline.professors_pipeline import professors_pipeline
+from src.pipeline.requires_pipeline import requires_pipeline
+from src.pipeline.requisite_pipeline import requisites_pipeline
+from src.pipeline.satisfies_pipeline import satisfies_pipeline
+from src.pipeline.study_programs_pipeline import study_programs_pipeline
+from src.pipeline.teaches_pipeline import teaches_pipeline
+
+# node pipelines come first, so every relationship pipeline finds its endpoints
+PIPELINES: list[Callable[[], Pipeline]] = [
+    study_programs_pipeline, courses_pipeline, professors_pipeline, curricula_pipeline, requisites_pipeline,
+    offers_pipeline, includes_pipeline, requires_pipeline, satisfies_pipeline, teaches_pipeline,
+]
+
+
+@dataclass
+class StageResult:
+    scale: int
+    pipeline: str
+    stage: str
+    rows: int
+    seconds: float
+    rows_per_second: float
+    peak_python_memory_bytes: int
+    peak_arrow_memory_bytes: int
+
+
+class ArrowMemorySampler:
+    INTERVAL_IN_SECONDS: float = 0.005
+
+    def __init__(self):
+        self.pool: pa.MemoryPool = pa.default_memory_pool()
+        self.peak: int = 0
+        self.pool_peak: int = 0
+        self.stopped: threading.Event = threading.Event()
+        self.thread: threading.Thread = threading.Thread(target=self.sample, name="arrow-memory-sampler", daemon=True)
+
+    def sample(self):
+        while not self.stopped.wait(self.INTERVAL_IN_SECONDS):
+            self.peak = max(self.peak, self.pool.bytes_allocated())
+
+    def __enter__(self) -> "ArrowMemorySampler":
+        self.peak = self.pool.bytes_allocated()
+        self.pool_peak = self.pool.max_memory()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, self.pool.bytes_allocated())
+        # the pool keeps its own high-water mark, which is exact whenever the stage raised it
+        if self.pool.max_memory() > self.pool_peak:
+            self.peak = self.pool.max_memory()
+
+
+def count_rows(data: Any) -> int:
+    if isinstance(data, pa.Table):
+        return data.num_rows
+    if isinstance(data, list):
+        return sum(count_rows(item) for item in data)
+    return 0
+
+
+async def benchmark_pipeline(scale: int, pipeline: Pipeline) -> list[StageResult]:
+    results: list[StageResult] = []
+    data: Any = None
+    for stage in pipeline.build().stages:
+        tracemalloc.reset_peak()
+        start: float = time.perf_counter()
+        with ArrowMemorySampler() as arrow_memory:
+            output: Any = await stage.run(data)
+        seconds: float = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        # stages that only write to the database return nothing, so they are measured by their input
+        rows: int = count_rows(output) or count_rows(data)
+        results.append(StageResult(
+            scale=scale,
+            pipeline=pipeline.name,
+            stage=stage.name,
+            rows=rows,
+            seconds=seconds,
+            rows_per_second=rows / seconds if seconds else 0.0,
+            peak_python_memory_bytes=peak,
+            peak_arrow_memory_bytes=arrow_memory.peak,
+        ))
+        data = output
+    return results
+
+
+async def benchmark_scale(scale: int, latency_model: LatencyModel) -> list[StageResult]:
+    row_counts: dict[str, int] = SyntheticDataGenerator(scale).generate()
+    logging.info(f"Generated {sum(row_counts.values())} rows at scale {scale}x")
+    backend: FakeNeo4jBackend = FakeNeo4jBackend.install(latency_model)
+    AdaptiveTransactionSizeController._controllers.clear()
+    NodeUidRegistry._uids.clear()
+    NodeUidRegistry._value_sets.clear()
+    DataIntegrityMixin._seen_pairs.clear()
+
+    results: list[StageResult] = []
+    tracemalloc.start()
+    try:
+        for pipeline in PIPELINES:
+            results.extend(await benchmark_pipeline(scale, pipeline()))
+    finally:
+        tracemalloc.stop()
+    logging.info(f"Wrote {backend.rows} rows in {backend.transactions} transactions at scale {scale}x")
+    return results
+
+
+def format_results(results: list[StageResult]) -> str:
+    header: str = f"{'scale':>5}  {'pipeline':<24}  {'stage':<18}  {'rows':>9}  {'seconds':>8}  " \
+                  f"{'rows/sec':>11}  {'peak py MiB':>11}  {'peak arrow MiB':>14}"
+    lines: list[str] = [header, "-" * len(header)]
+    for result in results:
+        lines.append(f"{result.scale:>4}x  {result.pipeline:<24}  {result.stage:<18}  {result.rows:>9}  "
+                     f"{result.seconds:>8.3f}  {result.rows_per_second:>11.0f}  "
+                     f"{result.peak_python_memory_bytes / 2 ** 20:>11.1f}  "
+                     f"{result.peak_arrow_memory_bytes / 2 ** 20:>14.1f}")
+    return "\n".join(lines)
+
+
+def serialize_results(results: list[StageResult]) -> list[dict[str, Any]]:
+    return [asdict(result) for result in results]
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+
+from src.configurations import ApplicationConfiguration
+from src.models.enums import StageType
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    key: str
+
+
+class StepCache:
+    STEP_CACHE_ENABLED: bool = ApplicationConfiguration.STEP_CACHE_ENABLED
+    STEP_CACHE_DIRECTORY: Path = ApplicationConfiguration.STEP_CACHE_DIRECTORY
+    STEP_CACHE_MAX_SIZE_IN_BYTES: int = ApplicationConfiguration.STEP_CACHE_MAX_SIZE_IN_BYTES
+    CACHEABLE_STAGE_TYPES: frozenset[StageType] = frozenset({StageType.LOAD, StageType.RENAME, StageType.CAST})
+
+    @staticmethod
+    def is_cacheable(stage_type: StageType) -> bool:
+        return StepCache.STEP_CACHE_ENABLED and stage_type in StepCache.CACHEABLE_STAGE_TYPES
+
+    @staticmethod
+    def generate_key(fingerprint: str, function: callable, args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
+        return hashlib.sha256(
+            repr((fingerprint, function.__qualname__, args, sorted(kwargs.items()))).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def generate_path(key: str) -> Path:
+        return StepCache.STEP_CACHE_DIRECTORY / f"{key}.arrow"
+
+    @staticmethod
+    def contains(key: str) -> bool:
+        path: Path = StepCache.generate_path(key)
+        if not path.exists():
+            return False
+        # the modification time orders the entries for eviction, so a hit refreshes it
+        os.utime(path)
+        return True
+
+    @staticmethod
+    async def load(key: str) -> pa.Table:
+        return await asyncio.to_thread(StepCache.read, StepCache.generate_path(key))
+
+    @staticmethod
+    def read(path: Path) -> pa.Table:
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    async def store(key: str, table: pa.Table):
+        await asyncio.to_thread(StepCache.write, StepCache.generate_path(key), table)
+        await asyncio.to_thread(StepCache.evict)
+
+    @staticmethod
+    def write(path: Path, table: pa.Table):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path: Path = path.with_suffix(f".{os.getpid()}.tmp")
+        with pa.OSFile(str(temporary_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        temporary_path.replace(path)
+
+    @staticmethod
+    def evict():
+        entries: list[tuple[Path, os.stat_result]] = sorted(
+            ((path, path.stat()) for path in StepCache.STEP_CACHE_DIRECTORY.glob("*.arrow")),
+            key=lambda entry: entry[1].st_mtime
+        )
+        size: int = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if size <= StepCache.STEP_CACHE_MAX_SIZE_IN_BYTES:
+                break
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
+            logging.info(f"Evicted cached step result {path.name}")
@@ -0,0 +1,169 @@
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+from src.configurations import ApplicationConfiguration, RelationshipConfiguration, CONFIGURATIONS
+from src.cypher import CypherTemplate
+from src.models.enums import CypherTemplateType
+from src.storage import IcebergClient
+
+
+class CheckpointJournal:
+    PATH: Path = ApplicationConfiguration.CHECKPOINT_FILE_PATH
+    RESUMED_TEMPLATE_TYPES: dict[CypherTemplateType, CypherTemplateType] = {
+        CypherTemplateType.CREATE_NODES: CypherTemplateType.MERGE_NODES,
+        CypherTemplateType.CREATE_RELATIONSHIPS: CypherTemplateType.MERGE_RELATIONSHIPS,
+    }
+    _connection: sqlite3.Connection | None = None
+    _resuming: bool = False
+    _segments: dict[tuple[str, str], int] = {}
+    _skipped_rows: dict[str, int] = {}
+
+    @classmethod
+    async def open(cls, resume: bool):
+        cls.PATH.parent.mkdir(parents=True, exist_ok=True)
+        cls._connection = sqlite3.connect(cls.PATH)
+        cls._connection.execute("PRAGMA journal_mode=WAL")
+        cls._connection.execute("""
+            CREATE TABLE IF NOT EXISTS batches (
+                label TEXT NOT NULL,
+                template_type TEXT NOT NULL,
+                snapshots TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                start INTEGER NOT NULL,
+                stop INTEGER NOT NULL,
+                PRIMARY KEY (label, template_type, snapshots, segment, start)
+            )
+            """)
+        cls._connection.execute("CREATE TABLE IF NOT EXISTS layout (fingerprint TEXT NOT NULL)")
+        cls._resuming = resume and cls.verify_batches() and cls.verify_layout() and await cls.verify_snapshots()
+        if cls._resuming:
+            logging.info(f"Resuming from {cls.count_batches()} checkpointed batches in {cls.PATH}")
+        else:
+            cls.reset()
+
+    @classmethod
+    def verify_batches(cls) -> bool:
+        # a completed run resets the journal, and a crash before the first batch leaves the graph half cleared
+        if cls.count_batches() == 0:
+            logging.warning(f"{cls.PATH} holds no checkpointed batches, starting over with a full load instead of "
+                            f"resuming")
+            return False
+        return True
+
+    @classmethod
+    def verify_layout(cls) -> bool:
+        row: tuple[str] | None = cls._connection.execute("SELECT fingerprint FROM layout").fetchone()
+        # the journaled offsets only point at the same rows if the data is split up the same way
+        if row is None or row[0] != cls.generate_layout_fingerprint():
+            logging.warning(f"The batches in {cls.PATH} were checkpointed with other partitioning, streaming, "
+                            f"prefilter or ingestion strategy settings, starting over with a full load instead of "
+                            f"resuming")
+            return False
+        return True
+
+    @classmethod
+    def generate_layout_fingerprint(cls) -> str:
+        return json.dumps({
+            "number_of_partitions": ApplicationConfiguration.NUMBER_OF_PARTITIONS,
+            "pipeline_execution_mode": ApplicationConfiguration.PIPELINE_EXECUTION_MODE.value,
+            "pipeline_stream_chunk_size": ApplicationConfiguration.PIPELINE_STREAM_CHUNK_SIZE,
+            "prefilter_enabled": ApplicationConfiguration.PREFILTER_ENABLED,
+            "ingestion_strategies": {
+                label: configuration.ingestion_strategy.value for label, configuration in CONFIGURATIONS.items()
+                if isinstance(configuration, RelationshipConfiguration)
+            }
+        }, sort_keys=True)
+
+    @classmethod
+    async def verify_snapshots(cls) -> bool:
+        journaled_snapshots: list[tuple[str, str]] = cls._connection.execute(
+            "SELECT DISTINCT label, snapshots FROM batches").fetchall()
+        for label, snapshots in journaled_snapshots:
+            current_snapshots: str = await IcebergClient().find_snapshot_range(CONFIGURATIONS[label])
+            # batches of another snapshot match no rows, so merging the new data would leave the rows deleted since
+            if snapshots != current_snapshots:
+                logging.warning(f"{label} was checkpointed at snapshots {snapshots} but is now at {current_snapshots}, "
+                                f"starting over with a full load instead of resuming")
+                return False
+        return True
+
+    @classmethod
+    def is_resuming(cls) -> bool:
+        return cls._resuming
+
+    @classmethod
+    def resolve_template_type(cls, template_type: CypherTemplateType) -> CypherTemplateType:
+        # a batch may have committed right before the crash without being journaled, so a resumed run merges
+        return cls.RESUMED_TEMPLATE_TYPES.get(template_type, template_type) if cls._resuming else template_type
+
+    @classmethod
+    def generate_key(cls, template: CypherTemplate) -> tuple[str, str, str]:
+        return (*cls.generate_write_key(template), IcebergClient().generate_snapshot_range(template.configuration))
+
+    @classmethod
+    def generate_write_key(cls, template: CypherTemplate) -> tuple[str, str]:
+        # the merges of a resumed run continue the journal of the creates they replace
+        template_type: CypherTemplateType = cls.RESUMED_TEMPLATE_TYPES.get(template.template_type,
+                                                                           template.template_type)
+        return template.configuration.label, template_type.value
+
+    @classmethod
+    def next_segment(cls, template: CypherTemplate) -> int:
+        key: tuple[str, str] = cls.generate_write_key(template)
+        segment: int = cls._segments.get(key, 0)
+        cls._segments[key] = segment + 1
+        return segment
+
+    @classmethod
+    def find_pending_ranges(cls, template: CypherTemplate, segment: int, rows: int) -> list[tuple[int, int]]:
+        if not cls._resuming:
+            return [(0, rows)]
+        committed: list[tuple[int, int]] = cls._connection.execute(
+            "SELECT start, stop FROM batches WHERE label = ? AND template_type = ? AND snapshots = ? AND segment = ? "
+            "ORDER BY start",
+            (*cls.generate_key(template), segment)
+        ).fetchall()
+        pending: list[tuple[int, int]] = []
+        offset: int = 0
+        for start, stop in committed:
+            if start > offset:
+                pending.append((offset, min(start, rows)))
+            offset = max(offset, stop)
+        if offset < rows:
+            pending.append((offset, rows))
+        if committed:
+            skipped_rows: int = rows - sum(stop - start for start, stop in pending)
+            cls._skipped_rows[template.name] = cls._skipped_rows.get(template.name, 0) + skipped_rows
+        return pending
+
+    @classmethod
+    def record(cls, template: CypherTemplate, segment: int, start: int, stop: int):
+        if cls._connection is None:
+            return
+        with cls._connection:
+            cls._connection.execute("INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?, ?, ?)",
+                                    (*cls.generate_key(template), segment, start, stop))
+
+    @classmethod
+    def log_skipped_rows(cls):
+        for name, rows in cls._skipped_rows.items():
+            logging.info(f"Skipped {rows} checkpointed rows of {name}")
+
+    @classmethod
+    def count_batches(cls) -> int:
+        return cls._connection.execute("SELECT COUNT(*) FROM batches").fetchone()[0]
+
+    @classmethod
+    def reset(cls):
+        with cls._connection:
+            cls._connection.execute("DELETE FROM batches")
+            cls._connection.execute("DELETE FROM layout")
+            cls._connection.execute("INSERT INTO layout VALUES (?)", (cls.generate_layout_fingerprint(),))
+
+    @classmethod
+    def close(cls):
+        if cls._connection is not None:
+            cls._connection.close()
+            cls._connection = None
@@ -5,7 +5,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from src.models.enums import FileIOType
+from src.models.enums import FileIOType, IngestionMode, DatabaseBackendType, SchemaIndexType, PipelineExecutionMode, \
+    CypherParameterEncoding, WriteSinkType, AdminImportFormat, RelationshipIngestionStrategy, DatabaseClearMode, \
+    DatabaseDeploymentMode
 
 @dataclass(frozen=True)
 class NodeConfiguration:
@@ -25,6 +27,9 @@ class NodeConfiguration:
         column: str = "_".join(re.findall(r'[A-Z][a-z]*', self.label))
         return "_".join([column.lower(), "id"])
 
+    def input_index_column(self) -> str:
+        return next(column for column, output_column in self.column_mapping.items() if output_column == self.index_column)
+
 @dataclass(frozen=True)
 class RelationshipConfiguration:
 
@@ -34,6 +39,7 @@ class RelationshipConfiguration:
     source_node: NodeConfiguration
     destination_node: NodeConfiguration
     index_column: str = "uid"
+    ingestion_strategy: RelationshipIngestionStrategy = RelationshipIngestionStrategy.CLIENT_PARTITIONED
 
     def input_columns(self) -> list[str]:
         return list(self.column_mapping.keys())
@@ -41,6 +47,10 @@ class RelationshipConfiguration:
     def output_columns(self) -> list[str]:
         return list(self.column_mapping.values())
 
+    def input_pair_columns(self) -> list[str]:
+        pair_columns: list[str] = [self.source_node.labeled_index_column(), self.destination_node.labeled_index_column()]
+        return [column for column, output_column in self.column_mapping.items() if output_column in pair_columns]
+
 STUDY_PROGRAMS: "NodeConfiguration" = NodeConfiguration(
         dataset_name=ENVIRONMENT_VARIABLES.get("STUDY_PROGRAMS_DATASET_NAME"),
         column_mapping=
@@ -114,7 +124,9 @@ OFFERS: RelationshipConfiguration = RelationshipConfiguration(
     },
     label="OFFERS",
     source_node=STUDY_PROGRAMS,
-    destination_node=CURRICULA
+    destination_node=CURRICULA,
+    ingestion_strategy=RelationshipIngestionStrategy(
+        ENVIRONMENT_VARIABLES.get('OFFERS_INGESTION_STRATEGY', 'CLIENT_PARTITIONED').upper())
 )
 
 INCLUDES: RelationshipConfiguration = RelationshipConfiguration(
@@ -127,7 +139,9 @@ INCLUDES: RelationshipConfiguration = RelationshipConfiguration(
     },
     label="INCLUDES",
     source_node=CURRICULA,
-    destination_node=COURSES
+    destination_node=COURSES,
+    ingestion_strategy=RelationshipIngestionStrategy(
+        ENVIRONMENT_VARIABLES.get('INCLUDES_INGESTION_STRATEGY', 'CLIENT_PARTITIONED').upper())
 )
 
 REQUIRES: RelationshipConfiguration = RelationshipConfiguration(
@@ -140,7 +154,9 @@ REQUIRES: RelationshipConfiguration = RelationshipConfiguration(
     },
     label="REQUIRES",
     source_node=COURSES,
-    destination_node=REQUISITES
+    destination_node=REQUISITES,
+    ingestion_strategy=RelationshipIngestionStrategy(
+        ENVIRONMENT_VARIABLES.get('REQUIRES_INGESTION_STRATEGY', 'CLIENT_PARTITIONED').upper())
 )
 
 SATISFIES: RelationshipConfiguration = RelationshipConfiguration(
@@ -153,7 +169,9 @@ SATISFIES: RelationshipConfiguration = RelationshipConfiguration(
     },
     label="SATISFIES",
     source_node=COURSES,
-    destination_node=REQUISITES
+    destination_node=REQUISITES,
+    ingestion_strategy=RelationshipIngestionStrategy(
+        ENVIRONMENT_VARIABLES.get('SATISFIES_INGESTION_STRATEGY', 'CLIENT_PARTITIONED').upper())
 )
 
 TEACHES: RelationshipConfiguration = RelationshipConfiguration(
@@ -166,11 +184,59 @@ TEACHES: RelationshipConfiguration = RelationshipConfiguration(
     },
     label="TEACHES",
     source_node=PROFESSORS,
-    destination_node=COURSES
+    destination_node=COURSES,
+    ingestion_strategy=RelationshipIngestionStrategy(
+        ENVIRONMENT_VARIABLES.get('TEACHES_INGESTION_STRATEGY', 'CLIENT_PARTITIONED').upper())
 )
 
+CONFIGURATIONS: dict[str, NodeConfiguration | RelationshipConfiguration] = {
+    configuration.label: configuration
+    for configuration in [STUDY_PROGRAMS, CURRICULA, COURSES, REQUISITES, PROFESSORS,
+                          OFFERS, INCLUDES, REQUIRES, SATISFIES, TEACHES]
+}
+
 class ApplicationConfiguration:
-    NUMBER_OF_PARTITIONS: int = 16
+    NUMBER_OF_PARTITIONS: int = int(ENVIRONMENT_VARIABLES.get("NUMBER_OF_PARTITIONS", 16))
+    INGESTION_MODE: IngestionMode = IngestionMode(ENVIRONMENT_VARIABLES.get("INGESTION_MODE", "FULL").upper())
+    INGESTION_STATE_FILE_PATH: Path = Path(ENVIRONMENT_VARIABLES.get("INGESTION_STATE_FILE_PATH", ".ingestion_state.json"))
+    CHANGE_TYPE_COLUMN: str = "change_type"
+    SCHEMA_INDEX_TYPE: SchemaIndexType = SchemaIndexType(
+        ENVIRONMENT_VARIABLES.get("SCHEMA_INDEX_TYPE", "UNIQUENESS_CONSTRAINT").upper())
+    TRANSACTION_INITIAL_SIZE: int = int(ENVIRONMENT_VARIABLES.get("TRANSACTION_INITIAL_SIZE", 1000))
+    TRANSACTION_MIN_SIZE: int = int(ENVIRONMENT_VARIABLES.get("TRANSACTION_MIN_SIZE", 100))
+    TRANSACTION_MAX_SIZE: int = int(ENVIRONMENT_VARIABLES.get("TRANSACTION_MAX_SIZE", 50000))
+    TRANSACTION_SIZE_INCREASE: int = int(ENVIRONMENT_VARIABLES.get("TRANSACTION_SIZE_INCREASE", 500))
+    TRANSACTION_SIZE_DECREASE_FACTOR: float = float(ENVIRONMENT_VARIABLES.get("TRANSACTION_SIZE_DECREASE_FACTOR", 0.5))
+    TRANSACTION_TARGET_LATENCY_IN_SECONDS: float = float(
+        ENVIRONMENT_VARIABLES.get("TRANSACTION_TARGET_LATENCY_IN_SECONDS", 1.0))
+    TRANSACTION_MAX_PAYLOAD_BYTES: int = int(ENVIRONMENT_VARIABLES.get("TRANSACTION_MAX_PAYLOAD_BYTES", 8388608))
+    CYPHER_PARAMETER_ENCODING: CypherParameterEncoding = CypherParameterEncoding(
+        ENVIRONMENT_VARIABLES.get("CYPHER_PARAMETER_ENCODING", "ROW").upper())
+    PIPELINE_EXECUTION_MODE: PipelineExecutionMode = PipelineExecutionMode(
+        ENVIRONMENT_VARIABLES.get("PIPELINE_EXECUTION_MODE", "BATCH").upper())
+    PIPELINE_STREAM_CHUNK_SIZE: int = int(ENVIRONMENT_VARIABLES.get("PIPELINE_STREAM_CHUNK_SIZE", 50000))
+    PIPELINE_STREAM_QUEUE_SIZE: int = int(ENVIRONMENT_VARIABLES.get("PIPELINE_STREAM_QUEUE_SIZE", 2))
+    PROFILE_TRACEMALLOC_FRAMES: int = int(ENVIRONMENT_VARIABLES.get("PROFILE_TRACEMALLOC_FRAMES", 1))
+    METRICS_REPORT_FILE_PATH: Path | None = Path(ENVIRONMENT_VARIABLES["METRICS_REPORT_FILE_PATH"]) \
+        if ENVIRONMENT_VARIABLES.get("METRICS_REPORT_FILE_PATH") else None
+    METRICS_PROMETHEUS_FILE_PATH: Path | None = Path(ENVIRONMENT_VARIABLES["METRICS_PROMETHEUS_FILE_PATH"]) \
+        if ENVIRONMENT_VARIABLES.get("METRICS_PROMETHEUS_FILE_PATH") else None
+    STEP_CACHE_ENABLED: bool = ENVIRONMENT_VARIABLES.get("STEP_CACHE_ENABLED", "false").lower() == "true"
+    STEP_CACHE_DIRECTORY: Path = Path(ENVIRONMENT_VARIABLES.get("STEP_CACHE_DIRECTORY", ".step_cache"))
+    STEP_CACHE_MAX_SIZE_IN_BYTES: int = int(ENVIRONMENT_VARIABLES.get("STEP_CACHE_MAX_SIZE_IN_BYTES", 1073741824))
+    WRITE_SINK: WriteSinkType = WriteSinkType(ENVIRONMENT_VARIABLES.get("WRITE_SINK", "NEO4J").upper())
+    CYPHER_DUMP_FILE_PATH: Path = Path(ENVIRONMENT_VARIABLES.get("CYPHER_DUMP_FILE_PATH", "dump/cypher.jsonl.gz"))
+    ADMIN_IMPORT_DIRECTORY: Path = Path(ENVIRONMENT_VARIABLES.get("ADMIN_IMPORT_DIRECTORY", "import"))
+    ADMIN_IMPORT_FORMAT: AdminImportFormat = AdminImportFormat(
+        ENVIRONMENT_VARIABLES.get("ADMIN_IMPORT_FORMAT", "CSV").upper())
+    SERVER_BATCHED_CHUNK_SIZE: int = int(ENVIRONMENT_VARIABLES.get("SERVER_BATCHED_CHUNK_SIZE", 200000))
+    SERVER_BATCHED_TRANSACTION_SIZE: int = int(ENVIRONMENT_VARIABLES.get("SERVER_BATCHED_TRANSACTION_SIZE", 10000))
+    SERVER_BATCHED_CONCURRENCY: int = int(ENVIRONMENT_VARIABLES.get("SERVER_BATCHED_CONCURRENCY", 4))
+    SERVER_BATCHED_RETRY_IN_SECONDS: int = int(ENVIRONMENT_VARIABLES.get("SERVER_BATCHED_RETRY_IN_SECONDS", 30))
+    DEAD_LETTER_DIRECTORY: Path = Path(ENVIRONMENT_VARIABLES.get("DEAD_LETTER_DIRECTORY", "dead_letters"))
+    PREFILTER_ENABLED: bool = ENVIRONMENT_VARIABLES.get("PREFILTER_ENABLED", "false").lower() == "true"
+    PREFILTER_REPORT_DIRECTORY: Path = Path(ENVIRONMENT_VARIABLES.get("PREFILTER_REPORT_DIRECTORY", "reports/prefilter"))
+    CHECKPOINT_FILE_PATH: Path = Path(ENVIRONMENT_VARIABLES.get("CHECKPOINT_FILE_PATH", ".checkpoints.sqlite"))
 
 
 class StorageConfiguration:
@@ -183,6 +249,7 @@ class StorageConfiguration:
     S3_PATH_STYLE_ACCESS: bool = ENVIRONMENT_VARIABLES.get('S3_PATH_STYLE_ACCESS')
     ICEBERG_CATALOG_NAME: str = ENVIRONMENT_VARIABLES.get("ICEBERG_CATALOG_NAME")
     ICEBERG_NAMESPACE: str = ENVIRONMENT_VARIABLES.get("ICEBERG_NAMESPACE")
+    ICEBERG_IO_MAX_WORKERS: int = int(ENVIRONMENT_VARIABLES.get("ICEBERG_IO_MAX_WORKERS", 8))
 
     DATABASE_USER: str = ENVIRONMENT_VARIABLES.get("DATABASE_USER")
     DATABASE_PASSWORD: str = ENVIRONMENT_VARIABLES.get("DATABASE_PASSWORD")
@@ -190,12 +257,24 @@ class StorageConfiguration:
     DATABASE_PORT: int = ENVIRONMENT_VARIABLES.get("DATABASE_PORT")
     DATABASE_NAME: str = ENVIRONMENT_VARIABLES.get("DATABASE_NAME")
     DATABASE_CONNECTION_STRING: str = fr"neo4j://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST_NAME}:{DATABASE_PORT}/{DATABASE_NAME}"
+    DATABASE_URI: str = fr"neo4j://{DATABASE_HOST_NAME}:{DATABASE_PORT}"
+    DATABASE_BACKEND: DatabaseBackendType = DatabaseBackendType(
+        ENVIRONMENT_VARIABLES.get("DATABASE_BACKEND", "NEOMODEL").upper())
     DATABASE_CONNECTION_ACQUISITION_TIMEOUT: float = float(
         ENVIRONMENT_VARIABLES.get("DATABASE_CONNECTION_ACQUISITION_TIMEOUT"))
     DATABASE_CONNECTION_TIMEOUT: float = float(ENVIRONMENT_VARIABLES.get("DATABASE_CONNECTION_TIMEOUT"))
     DATABASE_MAX_CONNECTION_LIFETIME: int = int(ENVIRONMENT_VARIABLES.get("DATABASE_MAX_CONNECTION_LIFETIME"))
     DATABASE_MAX_CONNECTION_POOL_SIZE: int = int(ENVIRONMENT_VARIABLES.get("DATABASE_MAX_CONNECTION_POOL_SIZE"))
     DATABASE_MAX_TRANSACTION_RETRY_TIME: int = int(ENVIRONMENT_VARIABLES.get("DATABASE_MAX_TRANSACTION_RETRY_TIME"))
+    DATABASE_INDEX_AWAIT_TIMEOUT_IN_SECONDS: int = int(
+        ENVIRONMENT_VARIABLES.get("DATABASE_INDEX_AWAIT_TIMEOUT_IN_SECONDS", 300))
+    DATABASE_CLEAR_MODE: DatabaseClearMode = DatabaseClearMode(
+        ENVIRONMENT_VARIABLES.get("DATABASE_CLEAR_MODE", "DELETE").upper())
+    DATABASE_CLEAR_BATCH_SIZE: int = int(ENVIRONMENT_VARIABLES.get("DATABASE_CLEAR_BATCH_SIZE", 10000))
+    DATABASE_CLEAR_CONCURRENCY: int = int(ENVIRONMENT_VARIABLES.get("DATABASE_CLEAR_CONCURRENCY", 4))
+    DATABASE_DEPLOYMENT_MODE: DatabaseDeploymentMode = DatabaseDeploymentMode(
+        ENVIRONMENT_VARIABLES.get("DATABASE_DEPLOYMENT_MODE", "IN_PLACE").upper())
+    DATABASE_ALIAS: str = ENVIRONMENT_VARIABLES.get("DATABASE_ALIAS", "graph")
 
     DATABASE_RETRY_COUNT: int = int(ENVIRONMENT_VARIABLES.get("DATABASE_RETRY_COUNT"))
     DATABASE_RETRY_MULTIPLIER_IN_SECONDS: int = int(ENVIRONMENT_VARIABLES.get("DATABASE_RETRY_MULTIPLIER_IN_SECONDS"))
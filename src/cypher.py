@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from src.configurations import NodeConfiguration, RelationshipConfiguration, ApplicationConfiguration
+from src.models.enums import CypherParameterEncoding, CypherTemplateType, RelationshipIngestionStrategy
+from src.storage import Neo4jClient
+
+
+@dataclass
+class CypherTemplate:
+    name: str
+    cypher: str
+    columns: list[str]
+    template_type: CypherTemplateType
+    configuration: NodeConfiguration | RelationshipConfiguration
+    auto_commit: bool = False
+    calls: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    warmed_up: bool = False
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def record(self, rows: int, seconds: float):
+        self.calls += 1
+        self.rows += rows
+        self.seconds += seconds
+
+
+class CypherTemplateRegistry:
+    # CALL (row) { ... } IN CONCURRENT TRANSACTIONS ... ON ERROR RETRY is only understood from this release on
+    SERVER_BATCHED_MINIMUM_VERSION: tuple[int, int] = (2025, 3)
+    _templates: dict[str, CypherTemplate] = {}
+
+    @classmethod
+    def get(cls, configuration: NodeConfiguration | RelationshipConfiguration,
+            template_type: CypherTemplateType) -> CypherTemplate:
+        name: str = f"{configuration.label}:{template_type}"
+        if name not in cls._templates:
+            cls._templates[name] = cls.compile(name, configuration, template_type)
+        return cls._templates[name]
+
+    @classmethod
+    def compile(cls, name: str, configuration: NodeConfiguration | RelationshipConfiguration,
+                template_type: CypherTemplateType) -> CypherTemplate:
+        if isinstance(configuration, NodeConfiguration):
+            columns: list[str] = [configuration.index_column] if template_type == CypherTemplateType.DELETE_NODES \
+                else configuration.output_columns()
+            body: str = cls.compile_node_body(configuration, template_type)
+        else:
+            columns: list[str] = [configuration.source_node.labeled_index_column(),
+                                  configuration.destination_node.labeled_index_column()]
+            body: str = cls.compile_relationship_body(configuration, template_type)
+        auto_commit: bool = isinstance(configuration, RelationshipConfiguration) and \
+            configuration.ingestion_strategy == RelationshipIngestionStrategy.SERVER_BATCHED
+        if auto_commit and template_type == CypherTemplateType.CREATE_RELATIONSHIPS:
+            # inner transactions stay committed when the statement fails, so a retried or replayed chunk has to merge
+            body = cls.compile_relationship_body(configuration, CypherTemplateType.MERGE_RELATIONSHIPS)
+        if auto_commit:
+            body = cls.compile_in_transactions_clause(body)
+        return CypherTemplate(name=name, cypher=f"{cls.compile_unwind_clause(columns)}\n{body}", columns=columns,
+                              template_type=template_type, configuration=configuration, auto_commit=auto_commit)
+
+    @staticmethod
+    def compile_unwind_clause(columns: list[str]) -> str:
+        if ApplicationConfiguration.CYPHER_PARAMETER_ENCODING == CypherParameterEncoding.ROW:
+            return "UNWIND $rows AS row"
+        # one list per column is sent, so the column names are not repeated in every row
+        return (f"UNWIND range(0, size(${columns[0]}) - 1) AS i "
+                f"WITH {{{', '.join(f'{column}: ${column}[i]' for column in columns)}}} AS row")
+
+    @staticmethod
+    def compile_in_transactions_clause(body: str) -> str:
+        # the server splits the rows into concurrent inner transactions and retries the ones that deadlock
+        return f"""
+            CALL (row) {{{body}}} IN {ApplicationConfiguration.SERVER_BATCHED_CONCURRENCY} CONCURRENT TRANSACTIONS
+            OF {ApplicationConfiguration.SERVER_BATCHED_TRANSACTION_SIZE} ROWS
+            ON ERROR RETRY FOR {ApplicationConfiguration.SERVER_BATCHED_RETRY_IN_SECONDS} SECONDS THEN FAIL
+            """
+
+    @staticmethod
+    def compile_node_body(configuration: NodeConfiguration, template_type: CypherTemplateType) -> str:
+        set_clause: str = f"SET {', '.join([f'n.{column} = row.{column}' for column in configuration.output_columns()])}"
+        return {
+            CypherTemplateType.CREATE_NODES: f"""
+                   CREATE (n:{configuration.label} {{uid: row.uid}})
+                   {set_clause}
+                   """,
+            CypherTemplateType.MERGE_NODES: f"""
+                   MERGE (n:{configuration.label} {{uid: row.uid}})
+                   {set_clause}
+                   """,
+            CypherTemplateType.DELETE_NODES: f"""
+                   MATCH (n:{configuration.label} {{uid: row.uid}})
+                   DETACH DELETE n
+                   """,
+        }[template_type]
+
+    @staticmethod
+    def compile_relationship_body(configuration: RelationshipConfiguration, template_type: CypherTemplateType) -> str:
+        source: str = f"src:{configuration.source_node.label} {{uid: row.{configuration.source_node.labeled_index_column()}}}"
+        destination: str = f"dest:{configuration.destination_node.label} " \
+                           f"{{uid: row.{configuration.destination_node.labeled_index_column()}}}"
+        return {
+            CypherTemplateType.CREATE_RELATIONSHIPS: f"""
+            MATCH ({source})
+            MATCH ({destination})
+            CREATE (src)-[r:{configuration.label}]->(dest)
+            """,
+            CypherTemplateType.MERGE_RELATIONSHIPS: f"""
+            MATCH ({source})
+            MATCH ({destination})
+            MERGE (src)-[r:{configuration.label}]->(dest)
+            """,
+            CypherTemplateType.DELETE_RELATIONSHIPS: f"""
+            MATCH ({source})-[r:{configuration.label}]->({destination})
+            DELETE r
+            """,
+        }[template_type]
+
+    @staticmethod
+    def generate_empty_parameters(template: CypherTemplate) -> dict[str, list]:
+        if ApplicationConfiguration.CYPHER_PARAMETER_ENCODING == CypherParameterEncoding.ROW:
+            return {"rows": []}
+        return {column: [] for column in template.columns}
+
+    @classmethod
+    async def warm_up(cls, template: CypherTemplate):
+        # concurrent first batches wait for a single plan instead of all planning the same query
+        async with template.lock:
+            if template.warmed_up:
+                return
+            start: float = time.perf_counter()
+            await Neo4jClient.explain_cypher(template.cypher, cls.generate_empty_parameters(template))
+            template.warmed_up = True
+            logging.info(f"Warmed up the plan of {template.name} in {time.perf_counter() - start:.2f} seconds")
+
+    @classmethod
+    async def warm_up_all(cls, configurations: list[NodeConfiguration | RelationshipConfiguration],
+                          template_types: list[CypherTemplateType]):
+        await asyncio.gather(*[cls.warm_up(cls.get(configuration, template_type))
+                               for configuration in configurations for template_type in template_types])
+
+    @classmethod
+    def log_statistics(cls):
+        for template in sorted(cls._templates.values(), key=lambda template: -template.seconds):
+            if template.calls:
+                logging.info(f"Template {template.name}: {template.calls} calls, {template.rows} rows "
+                             f"in {template.seconds:.2f} seconds")
@@ -0,0 +1,75 @@
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+
+from src.configurations import ApplicationConfiguration
+from src.cypher import CypherTemplate
+
+
+class DeadLetterStore:
+    DIRECTORY: Path = ApplicationConfiguration.DEAD_LETTER_DIRECTORY
+    INDEX_FILE_NAME: str = "index.jsonl"
+    _stored: int = 0
+
+    @classmethod
+    def generate_index_path(cls) -> Path:
+        return cls.DIRECTORY / cls.INDEX_FILE_NAME
+
+    @classmethod
+    def store(cls, template: CypherTemplate, df: pa.Table, error: BaseException):
+        cls.DIRECTORY.mkdir(parents=True, exist_ok=True)
+        file_name: str = f"{template.configuration.label}-{template.template_type.lower()}-{uuid.uuid4().hex}.arrow"
+        cls.write(cls.DIRECTORY / file_name, df)
+        # the batch is written before its index entry, so the index never points at a missing file
+        with cls.generate_index_path().open("a", encoding="utf-8") as file:
+            file.write(json.dumps({
+                "label": template.configuration.label,
+                "template_type": template.template_type,
+                "file": file_name,
+                "rows": df.num_rows,
+                "error": f"{type(error).__name__}: {error}",
+                "failed_at": time.time(),
+            }) + "\n")
+        cls._stored += 1
+        logging.error(f"Dead-lettered {df.num_rows} rows of {template.name} to {cls.DIRECTORY / file_name}: {error}")
+
+    @staticmethod
+    def write(path: Path, df: pa.Table):
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, df.schema) as writer:
+            writer.write_table(df)
+
+    @staticmethod
+    def read(path: Path) -> pa.Table:
+        with pa.memory_map(str(path), "r") as source:
+            return pa.ipc.open_file(source).read_all()
+
+    @classmethod
+    def load_entries(cls) -> list[dict[str, Any]]:
+        if not cls.generate_index_path().exists():
+            return []
+        with cls.generate_index_path().open(encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    @classmethod
+    def load_batch(cls, entry: dict[str, Any]) -> pa.Table:
+        return cls.read(cls.DIRECTORY / entry["file"])
+
+    @classmethod
+    def remove(cls, entries: list[dict[str, Any]]):
+        removed_files: set[str] = {entry["file"] for entry in entries}
+        remaining_entries: list[dict[str, Any]] = [entry for entry in cls.load_entries()
+                                                   if entry["file"] not in removed_files]
+        temporary_path: Path = cls.generate_index_path().with_suffix(".jsonl.tmp")
+        temporary_path.write_text("".join(json.dumps(entry) + "\n" for entry in remaining_entries), encoding="utf-8")
+        temporary_path.replace(cls.generate_index_path())
+        for file_name in removed_files:
+            (cls.DIRECTORY / file_name).unlink(missing_ok=True)
+
+    @classmethod
+    def count_stored(cls) -> int:
+        return cls._stored
@@ -0,0 +1,110 @@
+import logging
+import time
+from typing import Any
+
+from src.checkpoint import CheckpointJournal
+from src.configurations import StorageConfiguration, RelationshipConfiguration, CONFIGURATIONS
+from src.models.enums import DatabaseDeploymentMode
+from src.storage import Neo4jBackend, Neo4jClient, IcebergClient
+
+
+class BlueGreenDeployment:
+    ENABLED: bool = StorageConfiguration.DATABASE_DEPLOYMENT_MODE == DatabaseDeploymentMode.BLUE_GREEN
+    ALIAS: str = StorageConfiguration.DATABASE_ALIAS
+    COLORS: tuple[str, str] = ("blue", "green")
+    _live_database: str | None = None
+    _target_database: str | None = None
+
+    @classmethod
+    def generate_database_name(cls, color: str) -> str:
+        return f"{cls.ALIAS}-{color}"
+
+    @classmethod
+    def generate_other_database_name(cls, database: str | None) -> str:
+        colors: list[str] = [color for color in cls.COLORS if cls.generate_database_name(color) != database]
+        return cls.generate_database_name(colors[0])
+
+    @classmethod
+    async def find_live_database(cls) -> str | None:
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        databases: list[list[Any]] = await neo4j.execute_system(
+            "SHOW ALIASES FOR DATABASE YIELD name, database WHERE name = $alias RETURN database", {"alias": cls.ALIAS})
+        return databases[0][0] if databases else None
+
+    @classmethod
+    async def prepare(cls, incremental: bool):
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        editions: list[list[Any]] = await neo4j.query("CALL dbms.components() YIELD edition RETURN edition")
+        if not editions or editions[0][0] != "enterprise":
+            raise RuntimeError("Blue/green deployments need the enterprise edition, which supports database aliases")
+        cls._live_database = await cls.find_live_database()
+        if incremental:
+            if cls._live_database is None:
+                raise RuntimeError(f"Alias {cls.ALIAS} does not exist, so there is no graph to apply changes to")
+            # changes are small and the graph stays complete, so they are applied to the live database
+            cls._target_database = cls._live_database
+        else:
+            cls._target_database = cls.generate_other_database_name(cls._live_database)
+            start: float = time.perf_counter()
+            if CheckpointJournal.is_resuming():
+                await neo4j.execute_system(f"CREATE DATABASE `{cls._target_database}` IF NOT EXISTS WAIT")
+            else:
+                await neo4j.execute_system(f"CREATE OR REPLACE DATABASE `{cls._target_database}` WAIT")
+            logging.info(f"Prepared staging database {cls._target_database} in {time.perf_counter() - start:.2f} "
+                         f"seconds, {cls.ALIAS} keeps serving {cls._live_database}")
+        await neo4j.use_database(cls._target_database)
+
+    @classmethod
+    async def verify(cls) -> bool:
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        empty_labels: list[str] = []
+        for label, configuration in CONFIGURATIONS.items():
+            pattern: str = f"()-[entity:`{label}`]->()" if isinstance(configuration, RelationshipConfiguration) \
+                else f"(entity:`{label}`)"
+            [[count]] = await neo4j.query(f"MATCH {pattern} RETURN count(entity)")
+            logging.info(f"Staging database {cls._target_database} holds {count} {label}")
+            if count == 0:
+                empty_labels.append(label)
+        if empty_labels:
+            logging.error(f"Staging database {cls._target_database} has no {', '.join(empty_labels)}")
+        return not empty_labels
+
+    @classmethod
+    async def publish(cls) -> bool:
+        if not cls.ENABLED or cls._target_database == cls._live_database:
+            return True
+        if not await cls.verify():
+            logging.error(f"{cls.ALIAS} keeps serving {cls._live_database}, "
+                          f"the staging database {cls._target_database} is left for inspection")
+            return False
+        await cls.switch(cls._target_database)
+        if cls._live_database is not None:
+            logging.info(f"Kept {cls._live_database} for a rollback with --rollback")
+        return True
+
+    @classmethod
+    async def switch(cls, database: str):
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        # the alias is repointed in one system transaction, so readers move from one complete graph to the other
+        if await cls.find_live_database() is None:
+            await neo4j.execute_system(f"CREATE ALIAS `{cls.ALIAS}` FOR DATABASE `{database}`")
+        else:
+            await neo4j.execute_system(f"ALTER ALIAS `{cls.ALIAS}` SET DATABASE TARGET `{database}`")
+        logging.info(f"Switched {cls.ALIAS} to {database}")
+
+    @classmethod
+    async def rollback(cls):
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        live_database: str | None = await cls.find_live_database()
+        if live_database is None:
+            raise RuntimeError(f"Alias {cls.ALIAS} does not exist, so there is nothing to roll back")
+        previous_database: str = cls.generate_other_database_name(live_database)
+        statuses: list[list[Any]] = await neo4j.execute_system(
+            "SHOW DATABASES YIELD name, currentStatus WHERE name = $name RETURN currentStatus",
+            {"name": previous_database})
+        if not statuses or statuses[0][0] != "online":
+            raise RuntimeError(f"The previous database {previous_database} is not online, so there is nothing to "
+                               f"roll back to")
+        await cls.switch(previous_database)
+        # the recorded snapshots describe the graph that was rolled back, so the next run rebuilds in full
+        IcebergClient.reset_ingestion_state()
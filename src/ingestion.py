@@ -1,71 +1,274 @@
 import asyncio
+import logging
+import time
+from typing import Any, Coroutine
 
-import pandas as pd
-from neo4j.exceptions import TransientError
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from neo4j.exceptions import DriverError, Neo4jError, TransientError
 from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 
-from src.storage import Neo4jClient
-from src.configurations import StorageConfiguration, NodeConfiguration, RelationshipConfiguration
+from src.checkpoint import CheckpointJournal
+from src.cypher import CypherTemplate, CypherTemplateRegistry
+from src.dead_letter import DeadLetterStore
+from src.instrumentation import Instrumentation
+from src.integrity import NodeUidRegistry
+from src.models.enums import ChangeType, CypherParameterEncoding, CypherTemplateType, RelationshipIngestionStrategy
+from src.sink import WriteSink, WriteSinkClient
+from src.configurations import StorageConfiguration, NodeConfiguration, RelationshipConfiguration, \
+    ApplicationConfiguration, CONFIGURATIONS
+
+
+class AdaptiveTransactionSizeController:
+    _controllers: dict[str, "AdaptiveTransactionSizeController"] = {}
+
+    def __init__(self, label: str):
+        self.label: str = label
+        self.size: float = ApplicationConfiguration.TRANSACTION_INITIAL_SIZE
+        self.generation: int = 0
+
+    @classmethod
+    def for_label(cls, label: str) -> "AdaptiveTransactionSizeController":
+        if label not in cls._controllers:
+            cls._controllers[label] = cls(label)
+        return cls._controllers[label]
+
+    def next_size(self, row_offsets: np.ndarray, start: int, stop: int) -> tuple[int, int]:
+        return self.limit_payload(row_offsets, start, min(stop, start + int(self.size))), self.generation
+
+    @staticmethod
+    def limit_payload(row_offsets: np.ndarray, start: int, stop: int) -> int:
+        # the payload cap is checked against the measured size of the very rows in the batch
+        payload_stop: int = int(np.searchsorted(
+            row_offsets, row_offsets[start] + ApplicationConfiguration.TRANSACTION_MAX_PAYLOAD_BYTES, side="right")) - 1
+        return max(1, min(payload_stop, stop) - start)
+
+    def record_commit(self, generation: int, latency: float):
+        if latency > ApplicationConfiguration.TRANSACTION_TARGET_LATENCY_IN_SECONDS:
+            self.decrease(generation, f"a commit latency of {latency:.2f} seconds")
+        else:
+            self.size = min(ApplicationConfiguration.TRANSACTION_MAX_SIZE,
+                            self.size + ApplicationConfiguration.TRANSACTION_SIZE_INCREASE)
+
+    def record_transient_error(self, generation: int):
+        self.decrease(generation, "a transient error")
+
+    def decrease(self, generation: int, reason: str):
+        # transactions issued before the last decrease report stale feedback, so they are ignored
+        if generation != self.generation:
+            return
+        self.size = max(ApplicationConfiguration.TRANSACTION_MIN_SIZE,
+                        self.size * ApplicationConfiguration.TRANSACTION_SIZE_DECREASE_FACTOR)
+        self.generation += 1
+        logging.info(f"Decreased {self.label} transaction size to {int(self.size)} rows after {reason}")
 
 
 class DataIngestionMixin:
+    ROW_OVERHEAD_BYTES: int = 4
+    ROW_FIELD_OVERHEAD_BYTES: int = 8
+    # writes never outnumber the pooled connections, so commit latencies do not include waiting for one
+    _write_slots: asyncio.Semaphore = asyncio.Semaphore(StorageConfiguration.DATABASE_MAX_CONNECTION_POOL_SIZE)
 
-    @retry(stop=stop_after_attempt(StorageConfiguration.DATABASE_RETRY_COUNT),
-           wait=wait_random_exponential(
-               multiplier=StorageConfiguration.DATABASE_RETRY_MULTIPLIER_IN_SECONDS,
-               exp_base=StorageConfiguration.DATABASE_RETRY_EXPONENT_BASE
-           ),
-           retry=retry_if_exception_type(TransientError)
-           )
-    async def ingest_nodes(self, df: pd.DataFrame, configuration: NodeConfiguration):
-        rows: list[dict[str, str | int]] = df.to_dict(orient='records')
+    async def ingest_nodes(self, df: pa.Table, configuration: NodeConfiguration):
+        if ApplicationConfiguration.CHANGE_TYPE_COLUMN in df.column_names:
+            await self.apply_node_changes(df, configuration)
+            return
+
+        if ApplicationConfiguration.PREFILTER_ENABLED:
+            NodeUidRegistry.register(configuration, df[configuration.index_column])
+        template: CypherTemplate = CypherTemplateRegistry.get(
+            configuration, CheckpointJournal.resolve_template_type(CypherTemplateType.CREATE_NODES))
+        await self.execute_in_chunks(template, df, configuration.label)
+
+    async def apply_node_changes(self, df: pa.Table, configuration: NodeConfiguration):
+        upserts, deletes = await self.split_changes(df)
+
+        await asyncio.gather(
+            self.execute_in_chunks(CypherTemplateRegistry.get(configuration, CypherTemplateType.MERGE_NODES),
+                                   upserts, configuration.label),
+            self.execute_in_chunks(CypherTemplateRegistry.get(configuration, CypherTemplateType.DELETE_NODES),
+                                   deletes, configuration.label)
+        )
+
+    async def execute_in_chunks(self, template: CypherTemplate, df: pa.Table, label: str,
+                                concurrency: int = StorageConfiguration.DATABASE_MAX_CONNECTION_POOL_SIZE,
+                                segment: int | None = None):
+        if df.num_rows == 0:
+            return
+        if segment is None:
+            segment = CheckpointJournal.next_segment(template)
+        pending_ranges: list[tuple[int, int]] = CheckpointJournal.find_pending_ranges(template, segment, df.num_rows)
+        controller: AdaptiveTransactionSizeController = AdaptiveTransactionSizeController.for_label(label)
+        df = df.select(template.columns)
+        row_offsets: np.ndarray = await self.measure_row_offsets(df)
 
-        create_clause: str = f"""
-                   CREATE (n:{configuration.label} {{uid: row.uid}})
-                   """
+        async def execute_next_chunks():
+            while pending_ranges:
+                start, stop = pending_ranges[0]
+                size, generation = controller.next_size(row_offsets, start, stop)
+                if start + size == stop:
+                    pending_ranges.pop(0)
+                else:
+                    pending_ranges[0] = (start + size, stop)
+                await self.write_chunk(template, df.slice(start, size), controller, generation, segment, start)
 
-        set_clause: str = f"""
-                   SET {", ".join([f"n.{column} = row.{column}" for column in configuration.output_columns()])}
-                   """
+        await asyncio.gather(*[execute_next_chunks() for _ in range(concurrency)])
 
-        cypher: str = f"""
-                   UNWIND $rows AS row
-                   {create_clause}
-                   {set_clause}
-                   """
-        execute_cypher_task: asyncio.Task = asyncio.create_task(Neo4jClient.execute_cypher(cypher, {"rows": rows}))
-        await asyncio.gather(execute_cypher_task)
+    async def execute_in_rounds(self, template: CypherTemplate, rounds: list[list[pa.Table]], label: str):
+        start: float = time.perf_counter()
+        for index, partitions in enumerate(rounds):
+            round_start: float = time.perf_counter()
+            # chunks of one partition share nodes, so they are written one after another
+            await self.gather_with_limit([
+                self.execute_in_chunks(template, partition, label, concurrency=1,
+                                       segment=CheckpointJournal.next_segment(template))
+                for partition in partitions
+            ])
+            logging.info(f"{label} round {index + 1}/{len(rounds)}: {len(partitions)} partitions, "
+                         f"{sum(partition.num_rows for partition in partitions)} rows "
+                         f"in {time.perf_counter() - round_start:.2f} seconds")
+        logging.info(f"{label} {len(rounds)} rounds finished in {time.perf_counter() - start:.2f} seconds")
 
+    async def gather_with_limit(self, coroutines: list[Coroutine]) -> list[Any]:
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(StorageConfiguration.DATABASE_MAX_CONNECTION_POOL_SIZE)
+
+        async def run_with_limit(coroutine: Coroutine) -> Any:
+            async with semaphore:
+                return await coroutine
+
+        tasks: list[asyncio.Task] = [asyncio.create_task(run_with_limit(coroutine)) for coroutine in coroutines]
+        return await asyncio.gather(*tasks)
+
+    async def encode_parameters(self, df: pa.Table) -> dict[str, Any]:
+        if ApplicationConfiguration.CYPHER_PARAMETER_ENCODING == CypherParameterEncoding.ROW:
+            return {"rows": df.to_pylist()}
+        return {column: df[column].to_pylist() for column in df.column_names}
+
+    async def measure_row_offsets(self, df: pa.Table) -> np.ndarray:
+        row_bytes: np.ndarray = np.full(df.num_rows, self.ROW_OVERHEAD_BYTES, dtype=np.int64)
+        for column in df.column_names:
+            values: pa.ChunkedArray = df[column]
+            # every row carries its own key, so the column name counts once per row as well
+            row_bytes += len(column.encode()) + self.ROW_FIELD_OVERHEAD_BYTES
+            if pa.types.is_string(values.type) or pa.types.is_large_string(values.type) \
+                    or pa.types.is_binary(values.type) or pa.types.is_large_binary(values.type):
+                row_bytes += pc.fill_null(pc.binary_length(values), 0).to_numpy()
+            else:
+                row_bytes += values.nbytes // max(df.num_rows, 1) + 1
+        return np.concatenate([[0], np.cumsum(row_bytes)])
 
     @retry(stop=stop_after_attempt(StorageConfiguration.DATABASE_RETRY_COUNT),
            wait=wait_random_exponential(
                multiplier=StorageConfiguration.DATABASE_RETRY_MULTIPLIER_IN_SECONDS,
                exp_base=StorageConfiguration.DATABASE_RETRY_EXPONENT_BASE
            ),
-           retry=retry_if_exception_type(TransientError)
+           retry=retry_if_exception_type(TransientError),
+           before_sleep=Instrumentation.record_retry,
+           reraise=True
            )
+    async def execute_chunk(self, template: CypherTemplate, df: pa.Table,
+                            controller: AdaptiveTransactionSizeController | None = None, generation: int = 0):
+        sink: WriteSink = WriteSinkClient.connect()
+        parameters: dict[str, Any] = await self.encode_parameters(df) if sink.REQUIRES_PARAMETERS else {}
+        async with self._write_slots:
+            start: float = time.perf_counter()
+            try:
+                await sink.write(template, df, parameters)
+            except TransientError:
+                if controller is not None:
+                    controller.record_transient_error(generation)
+                raise
+            latency: float = time.perf_counter() - start
+        if controller is not None:
+            controller.record_commit(generation, latency)
+        template.record(df.num_rows, latency)
+
+    async def write_chunk(self, template: CypherTemplate, df: pa.Table,
+                          controller: AdaptiveTransactionSizeController | None = None, generation: int = 0,
+                          segment: int = 0, offset: int = 0):
+        try:
+            await self.execute_chunk(template, df, controller, generation)
+        except (Neo4jError, DriverError) as error:
+            # only this batch is given up on, the rest of the partition and the pipeline carry on
+            DeadLetterStore.store(template, df, error)
+            Instrumentation.record_dead_letter()
+            return
+        CheckpointJournal.record(template, segment, offset, offset + df.num_rows)
+
+    async def replay_dead_letters(self):
+        entries: list[dict[str, Any]] = DeadLetterStore.load_entries()
+        replayed_entries: list[dict[str, Any]] = []
+        for entry in entries:
+            template: CypherTemplate = CypherTemplateRegistry.get(CONFIGURATIONS[entry["label"]],
+                                                                  CypherTemplateType(entry["template_type"]))
+            try:
+                await self.execute_chunk(template, DeadLetterStore.load_batch(entry).select(template.columns))
+            except (Neo4jError, DriverError) as error:
+                logging.error(f"Replaying dead letter {entry['file']} failed again: {error}")
+                continue
+            replayed_entries.append(entry)
+        DeadLetterStore.remove(replayed_entries)
+        logging.info(f"Replayed {len(replayed_entries)} of {len(entries)} dead letters, "
+                     f"{len(entries) - len(replayed_entries)} remain in {DeadLetterStore.DIRECTORY}")
 
-    async def ingest_relationships(self, df: list[pd.DataFrame], configuration: RelationshipConfiguration):
+    async def ingest_relationships(self, df: list[list[pa.Table]], configuration: RelationshipConfiguration):
+        if any(ApplicationConfiguration.CHANGE_TYPE_COLUMN in partition.column_names for partitions in df
+               for partition in partitions):
+            await self.apply_relationship_changes(df, configuration)
+            return
 
-        match_clause = f"""
-            MATCH (src:{configuration.source_node.label} {{uid: row.{configuration.source_node.labeled_index_column()}}})
-            MATCH (dest:{configuration.destination_node.label} {{uid: row.{configuration.destination_node.labeled_index_column()}}})
-        """
+        await self.write_relationships(CypherTemplateRegistry.get(
+            configuration, CheckpointJournal.resolve_template_type(CypherTemplateType.CREATE_RELATIONSHIPS)
+        ), df, configuration)
 
-        create_clause = f"""
-            CREATE (src)-[r:{configuration.label}]->(dest)
-        """
+    async def write_relationships(self, template: CypherTemplate, rounds: list[list[pa.Table]],
+                                  configuration: RelationshipConfiguration):
+        partitions: list[pa.Table] = [partition for partitions in rounds for partition in partitions]
+        if not partitions:
+            return
+        if configuration.ingestion_strategy == RelationshipIngestionStrategy.SERVER_BATCHED:
+            await self.execute_server_batched(template, pa.concat_tables(partitions))
+        elif not WriteSinkClient.connect().REQUIRES_PARTITIONS:
+            # without lock contention there is nothing to gain from the rounds, so the partitions are written as one
+            await self.execute_in_chunks(template, pa.concat_tables(partitions), configuration.label)
+        else:
+            await self.execute_in_rounds(template, rounds, configuration.label)
 
-        cypher = f"""
-            UNWIND $rows AS row
-            {match_clause}
-            {create_clause}
-        """
+    async def execute_server_batched(self, template: CypherTemplate, df: pa.Table):
+        start: float = time.perf_counter()
+        segment: int = CheckpointJournal.next_segment(template)
+        pending_ranges: list[tuple[int, int]] = CheckpointJournal.find_pending_ranges(template, segment, df.num_rows)
+        df = df.select(template.columns)
+        row_offsets: np.ndarray = await self.measure_row_offsets(df)
+        # every request carries a large chunk, which the server splits into its own concurrent transactions
+        for range_start, range_stop in pending_ranges:
+            offset: int = range_start
+            while offset < range_stop:
+                size: int = AdaptiveTransactionSizeController.limit_payload(
+                    row_offsets, offset, min(range_stop, offset + ApplicationConfiguration.SERVER_BATCHED_CHUNK_SIZE))
+                await self.write_chunk(template, df.slice(offset, size), segment=segment, offset=offset)
+                offset += size
+        logging.info(f"{template.name} {df.num_rows} rows written in server-side batches "
+                     f"in {time.perf_counter() - start:.2f} seconds")
 
-        execute_cypher_tasks: list[asyncio.Task] = []
+    async def apply_relationship_changes(self, df: list[list[pa.Table]], configuration: RelationshipConfiguration):
+        upserts: list[list[pa.Table]] = []
+        deletes: list[list[pa.Table]] = []
+        for partitions in df:
+            changes: list[tuple[pa.Table, pa.Table]] = [await self.split_changes(partition)
+                                                        for partition in partitions]
+            upserts.append([upsert for upsert, _ in changes if upsert.num_rows])
+            deletes.append([delete for _, delete in changes if delete.num_rows])
 
-        for partition in df:
-            rows = partition.to_dict(orient="records")
-            execute_cypher_tasks.append(asyncio.create_task(Neo4jClient.execute_cypher(cypher, {"rows": rows})))
+        # deletes go first so that an edge removed and re-added between two snapshots survives
+        await self.write_relationships(CypherTemplateRegistry.get(configuration, CypherTemplateType.DELETE_RELATIONSHIPS),
+                                       deletes, configuration)
+        await self.write_relationships(CypherTemplateRegistry.get(configuration, CypherTemplateType.MERGE_RELATIONSHIPS),
+                                       upserts, configuration)
 
-        await asyncio.gather(*execute_cypher_tasks)
\ No newline at end of file
+    async def split_changes(self, df: pa.Table) -> tuple[pa.Table, pa.Table]:
+        change_type: pa.ChunkedArray = df[ApplicationConfiguration.CHANGE_TYPE_COLUMN]
+        df = df.drop_columns([ApplicationConfiguration.CHANGE_TYPE_COLUMN])
+        return (df.filter(pc.equal(change_type, ChangeType.UPSERT.value)),
+                df.filter(pc.equal(change_type, ChangeType.DELETE.value)))
@@ -0,0 +1,189 @@
+import json
+import logging
+import resource
+import sys
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import pyarrow as pa
+from tenacity import RetryCallState
+
+from src.configurations import ApplicationConfiguration
+from src.models.enums import MetricScope
+
+current_pipeline: ContextVar[str | None] = ContextVar("current_pipeline", default=None)
+current_stage: ContextVar[str | None] = ContextVar("current_stage", default=None)
+current_step_metrics: ContextVar["Metrics | None"] = ContextVar("current_step_metrics", default=None)
+
+
+@dataclass
+class Metrics:
+    scope: MetricScope
+    pipeline: str | None
+    stage: str | None
+    step: str | None
+    calls: int = 0
+    seconds: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    retries: int = 0
+    dead_letters: int = 0
+    rss_growth_bytes: int = 0
+    process_peak_rss_bytes: int = 0
+
+
+@dataclass
+class Measurement:
+    metrics: Metrics
+    output: Any = None
+
+
+class Instrumentation:
+    _metrics: dict[tuple[MetricScope, str | None, str | None, str | None], Metrics] = {}
+    _started_at: float = time.time()
+
+    @classmethod
+    @asynccontextmanager
+    async def measure(cls, scope: MetricScope, name: str, data: Any = None) -> AsyncIterator[Measurement]:
+        if scope == MetricScope.PIPELINE:
+            token = current_pipeline.set(name)
+        elif scope == MetricScope.STAGE:
+            token = current_stage.set(name)
+        key: tuple[MetricScope, str | None, str | None, str | None] = (
+            scope,
+            current_pipeline.get(),
+            current_stage.get() if scope != MetricScope.PIPELINE else None,
+            name if scope == MetricScope.STEP else None
+        )
+        if key not in cls._metrics:
+            cls._metrics[key] = Metrics(*key)
+        measurement: Measurement = Measurement(cls._metrics[key])
+        if scope == MetricScope.STEP:
+            token = current_step_metrics.set(measurement.metrics)
+
+        start: float = time.perf_counter()
+        start_rss: int = cls.get_rss_bytes()
+        try:
+            yield measurement
+        finally:
+            metrics: Metrics = measurement.metrics
+            metrics.calls += 1
+            metrics.seconds += time.perf_counter() - start
+            metrics.rows_in += cls.count_rows(data)
+            metrics.rows_out += cls.count_rows(measurement.output)
+            metrics.bytes_in += cls.count_bytes(data)
+            metrics.bytes_out += cls.count_bytes(measurement.output)
+            metrics.rss_growth_bytes = max(metrics.rss_growth_bytes, cls.get_rss_bytes() - start_rss)
+            metrics.process_peak_rss_bytes = max(metrics.process_peak_rss_bytes, cls.get_peak_rss_bytes())
+            {
+                MetricScope.PIPELINE: current_pipeline,
+                MetricScope.STAGE: current_stage,
+                MetricScope.STEP: current_step_metrics,
+            }[scope].reset(token)
+
+    @staticmethod
+    def record_retry(retry_state: RetryCallState):
+        metrics: Metrics | None = current_step_metrics.get()
+        if metrics is not None:
+            metrics.retries += 1
+
+    @staticmethod
+    def record_dead_letter():
+        metrics: Metrics | None = current_step_metrics.get()
+        if metrics is not None:
+            metrics.dead_letters += 1
+
+    @staticmethod
+    def count_rows(data: Any) -> int:
+        if isinstance(data, pa.Table):
+            return data.num_rows
+        if isinstance(data, list):
+            return sum(Instrumentation.count_rows(item) for item in data)
+        return 0
+
+    @staticmethod
+    def count_bytes(data: Any) -> int:
+        if isinstance(data, pa.Table):
+            return data.nbytes
+        if isinstance(data, list):
+            return sum(Instrumentation.count_bytes(item) for item in data)
+        return 0
+
+    @staticmethod
+    def get_rss_bytes() -> int:
+        # only linux exposes the current resident set size without another dependency
+        try:
+            with open("/proc/self/statm") as file:
+                return int(file.read().split()[1]) * resource.getpagesize()
+        except OSError:
+            return 0
+
+    @staticmethod
+    def get_peak_rss_bytes() -> int:
+        peak_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # linux reports kilobytes, macOS bytes
+        return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+    @classmethod
+    def export(cls):
+        if ApplicationConfiguration.METRICS_REPORT_FILE_PATH is not None:
+            cls.write(ApplicationConfiguration.METRICS_REPORT_FILE_PATH, cls.generate_report())
+        if ApplicationConfiguration.METRICS_PROMETHEUS_FILE_PATH is not None:
+            cls.write(ApplicationConfiguration.METRICS_PROMETHEUS_FILE_PATH, cls.generate_prometheus_text())
+
+    @staticmethod
+    def write(path: Path, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path: Path = path.with_suffix(f"{path.suffix}.tmp")
+        temporary_path.write_text(content)
+        temporary_path.replace(path)
+        logging.info(f"Wrote metrics to {path}")
+
+    @classmethod
+    def generate_report(cls) -> str:
+        return json.dumps({
+            "started_at": cls._started_at,
+            "finished_at": time.time(),
+            "process_peak_rss_bytes": cls.get_peak_rss_bytes(),
+            "metrics": [asdict(metrics) for metrics in cls._metrics.values()],
+        }, indent=2)
+
+    @classmethod
+    def generate_prometheus_text(cls) -> str:
+        lines: list[str] = []
+        for field, metric_type, description in [
+            ("calls", "counter", "Number of runs of a pipeline, stage or step."),
+            ("seconds", "counter", "Wall time spent in a pipeline, stage or step."),
+            ("rows_in", "counter", "Rows passed into a pipeline, stage or step."),
+            ("rows_out", "counter", "Rows returned by a pipeline, stage or step."),
+            ("bytes_in", "counter", "Arrow bytes passed into a pipeline, stage or step."),
+            ("bytes_out", "counter", "Arrow bytes returned by a pipeline, stage or step."),
+            ("retries", "counter", "Retried database transactions of a step."),
+            ("dead_letters", "counter", "Batches of a step that failed permanently and were dead-lettered."),
+            ("rss_growth_bytes", "gauge", "Largest growth of the resident set size over one run of a pipeline, "
+                                          "stage or step."),
+            ("process_peak_rss_bytes", "gauge", "Peak resident set size of the process since it started, as of when a "
+                                                "pipeline, stage or step last ended."),
+        ]:
+            name: str = f"ingestor_{field}" if metric_type == "gauge" else f"ingestor_{field}_total"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for metrics in cls._metrics.values():
+                labels: str = ",".join(
+                    f'{label}="{cls.escape_label_value(str(value))}"'
+                    for label, value in [("scope", metrics.scope.lower()), ("pipeline", metrics.pipeline),
+                                         ("stage", metrics.stage), ("step", metrics.step)]
+                    if value is not None
+                )
+                lines.append(f"{name}{{{labels}}} {getattr(metrics, field)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def escape_label_value(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
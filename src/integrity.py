@@ -0,0 +1,114 @@
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as csv
+
+from src.configurations import ApplicationConfiguration, NodeConfiguration, RelationshipConfiguration
+from src.storage import IcebergClient
+
+
+class NodeUidRegistry:
+    _uids: dict[str, list[pa.ChunkedArray]] = {}
+    _value_sets: dict[str, pa.Array] = {}
+
+    @classmethod
+    def register(cls, configuration: NodeConfiguration, uids: pa.ChunkedArray):
+        cls._uids.setdefault(configuration.label, []).append(uids)
+
+    @classmethod
+    async def get(cls, configuration: NodeConfiguration) -> pa.Array:
+        if configuration.label not in cls._value_sets:
+            if configuration.label in cls._uids:
+                registered_uids: list[pa.ChunkedArray] = cls._uids.pop(configuration.label)
+                uids: pa.ChunkedArray = pa.chunked_array(
+                    [chunk for uids in registered_uids for chunk in uids.chunks], type=registered_uids[0].type)
+            else:
+                # incremental runs only load the changed nodes, so the complete set comes from the table itself
+                logging.info(f"Reading the {configuration.label} uids from {configuration.dataset_name}")
+                uids: pa.ChunkedArray = await IcebergClient().read_column(configuration,
+                                                                          configuration.input_index_column())
+            cls._value_sets[configuration.label] = pc.unique(pc.drop_null(uids))
+        return cls._value_sets[configuration.label]
+
+
+class IntegrityReport:
+    DIRECTORY: Path = ApplicationConfiguration.PREFILTER_REPORT_DIRECTORY
+    _summaries: dict[str, dict[str, int]] = {}
+    _dropped: dict[str, list[pa.Table]] = {}
+
+    @classmethod
+    def record(cls, label: str, rows: int, dropped: dict[str, pa.Table]):
+        summary: dict[str, int] = cls._summaries.setdefault(label, {"rows": 0, "kept": 0})
+        summary["rows"] += rows
+        for reason, df in dropped.items():
+            summary[reason] = summary.get(reason, 0) + df.num_rows
+            if df.num_rows:
+                cls._dropped.setdefault(label, []).append(df.append_column("reason", pa.repeat(reason, df.num_rows)))
+        summary["kept"] += rows - sum(df.num_rows for df in dropped.values())
+
+    @classmethod
+    def export(cls):
+        if not cls._summaries:
+            return
+        cls.DIRECTORY.mkdir(parents=True, exist_ok=True)
+        for stale_path in cls.DIRECTORY.glob("*.csv"):
+            stale_path.unlink()
+        for label, dropped in cls._dropped.items():
+            csv.write_csv(pa.concat_tables(dropped), cls.DIRECTORY / f"{label}.csv")
+        (cls.DIRECTORY / "summary.json").write_text(json.dumps(cls._summaries, indent=2))
+        logging.info(f"Wrote the prefilter report to {cls.DIRECTORY}")
+
+
+class DataIntegrityMixin:
+    ROW_INDEX_COLUMN: str = "row_index"
+    _seen_pairs: dict[str, pa.Table] = {}
+
+    async def prefilter_relationships(self, df: pa.Table, configuration: RelationshipConfiguration) -> pa.Table:
+        if not ApplicationConfiguration.PREFILTER_ENABLED:
+            return df
+        rows: int = df.num_rows
+        dropped: dict[str, pa.Table] = {}
+        for reason, node_configuration in [("missing_source", configuration.source_node),
+                                           ("missing_destination", configuration.destination_node)]:
+            column: pa.ChunkedArray = df[node_configuration.labeled_index_column()]
+            uids: pa.Array = await NodeUidRegistry.get(node_configuration)
+            exists: pa.ChunkedArray = pc.is_in(column, value_set=uids.cast(column.type))
+            dropped[reason] = df.filter(pc.invert(exists))
+            df = df.filter(exists)
+
+        is_first: np.ndarray = self.find_first_pairs(df, configuration)
+        dropped["duplicate"] = df.filter(pa.array(~is_first))
+        df = df.filter(pa.array(is_first))
+
+        IntegrityReport.record(configuration.label, rows, dropped)
+        logging.info(f"Prefiltered {configuration.label}: kept {df.num_rows} of {rows} rows, dropped "
+                     f"{dropped['missing_source'].num_rows} without a {configuration.source_node.label}, "
+                     f"{dropped['missing_destination'].num_rows} without a {configuration.destination_node.label} "
+                     f"and {dropped['duplicate'].num_rows} duplicates")
+        return df
+
+    def find_first_pairs(self, df: pa.Table, configuration: RelationshipConfiguration) -> np.ndarray:
+        columns: list[str] = [configuration.source_node.labeled_index_column(),
+                              configuration.destination_node.labeled_index_column()]
+        if ApplicationConfiguration.CHANGE_TYPE_COLUMN in df.column_names:
+            columns.append(ApplicationConfiguration.CHANGE_TYPE_COLUMN)
+        first_rows: pa.Table = (
+            df.select(columns)
+            .append_column(self.ROW_INDEX_COLUMN, pa.array(np.arange(df.num_rows)))
+            .group_by(columns, use_threads=False)
+            .aggregate([(self.ROW_INDEX_COLUMN, "min")])
+        )
+        # streamed chunks of one table arrive one by one, so each is compared with the pairs kept from earlier ones
+        seen_pairs: pa.Table | None = self._seen_pairs.get(configuration.label)
+        if seen_pairs is not None:
+            first_rows = first_rows.join(seen_pairs, keys=columns, join_type="left anti")
+        pairs: pa.Table = first_rows.select(columns)
+        self._seen_pairs[configuration.label] = pairs if seen_pairs is None else pa.concat_tables([seen_pairs, pairs])
+
+        is_first: np.ndarray = np.zeros(df.num_rows, dtype=bool)
+        is_first[first_rows[f"{self.ROW_INDEX_COLUMN}_min"].to_numpy()] = True
+        return is_first
@@ -1,8 +1,19 @@
+import argparse
 import asyncio
 import logging
 import time
-
-from src.configurations import NodeConfiguration, STUDY_PROGRAMS, CURRICULA, COURSES, REQUISITES, PROFESSORS
+from pathlib import Path
+
+from src.configurations import STUDY_PROGRAMS, COURSES, PROFESSORS, CURRICULA, REQUISITES, OFFERS, INCLUDES, \
+    SATISFIES, REQUIRES, TEACHES, ApplicationConfiguration, RelationshipConfiguration, CONFIGURATIONS
+from src.checkpoint import CheckpointJournal
+from src.cypher import CypherTemplateRegistry
+from src.dead_letter import DeadLetterStore
+from src.deployment import BlueGreenDeployment
+from src.ingestion import DataIngestionMixin
+from src.instrumentation import Instrumentation
+from src.integrity import IntegrityReport
+from src.models.enums import CypherTemplateType, WriteSinkType, RelationshipIngestionStrategy
 from src.pipeline.courses_pipeline import courses_pipeline
 from src.pipeline.curricula_pipeline import curricula_pipeline
 from src.pipeline.includes_pipeline import includes_pipeline
@@ -13,66 +24,149 @@ from src.pipeline.professors_pipeline import professors_pipeline
 from src.pipeline.requisite_pipeline import requisites_pipeline
 from src.pipeline.study_programs_pipeline import study_programs_pipeline
 from src.pipeline.teaches_pipeline import teaches_pipeline
-from src.storage import Neo4jClient
-from src.patterns.builder.pipeline import Pipeline
+from src.profiling import PipelineProfiler
+from src.scheduler import PipelineScheduler
+from src.sink import CypherDumpSink, WriteSinkClient
+from src.storage import Neo4jClient, IcebergClient
 
 logging.basicConfig(level=logging.INFO)
 
 
-async def main():
-    logging.info("Starting...")
-    start = time.perf_counter()
+async def prepare_database():
     await Neo4jClient.verify_connection()
-    try:
-
+    server_batched_labels: list[str] = [
+        label for label, configuration in CONFIGURATIONS.items() if isinstance(configuration, RelationshipConfiguration)
+        and configuration.ingestion_strategy == RelationshipIngestionStrategy.SERVER_BATCHED
+    ]
+    if server_batched_labels:
+        await Neo4jClient.verify_server_version(CypherTemplateRegistry.SERVER_BATCHED_MINIMUM_VERSION,
+                                                f"The server_batched strategy of {', '.join(server_batched_labels)}")
+    if BlueGreenDeployment.ENABLED:
+        await BlueGreenDeployment.prepare(IcebergClient().is_incremental())
+    if IcebergClient().is_incremental():
+        logging.info("Applying changes since the last ingested snapshots...")
+        # the schema survives incremental runs, so the plans can be compiled before the first batch
+        await asyncio.gather(
+            CypherTemplateRegistry.warm_up_all(
+                [STUDY_PROGRAMS, COURSES, PROFESSORS, CURRICULA, REQUISITES],
+                [CypherTemplateType.MERGE_NODES, CypherTemplateType.DELETE_NODES]
+            ),
+            CypherTemplateRegistry.warm_up_all(
+                [OFFERS, INCLUDES, SATISFIES, REQUIRES, TEACHES],
+                [CypherTemplateType.MERGE_RELATIONSHIPS, CypherTemplateType.DELETE_RELATIONSHIPS]
+            )
+        )
+    elif CheckpointJournal.is_resuming():
+        # the graph holds the batches of the interrupted run, which the journal lets the pipelines skip
+        logging.info("Resuming the interrupted run on the existing graph...")
+    elif not BlueGreenDeployment.ENABLED:
         await Neo4jClient.clear_database()
         await Neo4jClient.drop_constraints()
         await Neo4jClient.drop_indices()
 
-        node_pipelines: list[Pipeline] = [
-            study_programs_pipeline(),
-            courses_pipeline(),
-            professors_pipeline(),
-            curricula_pipeline(),
-            requisites_pipeline()
-        ]
-
-        relationship_pipelines: list[Pipeline] = [
-            offers_pipeline(),
-            includes_pipeline(),
-            satisfies_pipeline(),
-            requires_pipeline(),
-            teaches_pipeline()
-        ]
-
-        node_ingestion_tasks: list[asyncio.Task[Pipeline]] = [asyncio.create_task(pipeline.build().run()) for pipeline
-                                                              in node_pipelines]
-        await asyncio.gather(*node_ingestion_tasks)
-
-        create_indices_tasks: list[asyncio.Task[None]] = [
-            asyncio.create_task(Neo4jClient.create_index(configuration.label, configuration.index_column)) for
-            configuration in [
-                STUDY_PROGRAMS,
-                CURRICULA,
-                COURSES,
-                REQUISITES,
-                PROFESSORS,
-            ]
-        ]
-
-        await asyncio.gather(*create_indices_tasks)
-
-        relationship_ingestion_tasks: list[asyncio.Task[Pipeline]] = [asyncio.create_task(pipeline.build().run()) for
-                                                                      pipeline in relationship_pipelines]
-        await asyncio.gather(*relationship_ingestion_tasks)
 
+async def main(profile_directory: Path | None = None, resume: bool = False):
+    logging.info("Starting...")
+    start = time.perf_counter()
+    if profile_directory is not None:
+        PipelineProfiler.enable(profile_directory)
+    writes_to_neo4j: bool = ApplicationConfiguration.WRITE_SINK == WriteSinkType.NEO4J
+    try:
+
+        if writes_to_neo4j:
+            await CheckpointJournal.open(resume)
+            await prepare_database()
+        elif resume:
+            logging.warning(f"Only runs against Neo4j can be resumed, the {ApplicationConfiguration.WRITE_SINK} "
+                            f"sink starts over")
+
+        scheduler: PipelineScheduler = (
+            PipelineScheduler()
+            .add_node_pipeline(study_programs_pipeline(), STUDY_PROGRAMS)
+            .add_node_pipeline(courses_pipeline(), COURSES)
+            .add_node_pipeline(professors_pipeline(), PROFESSORS)
+            .add_node_pipeline(curricula_pipeline(), CURRICULA)
+            .add_node_pipeline(requisites_pipeline(), REQUISITES)
+            .add_relationship_pipeline(offers_pipeline(), OFFERS)
+            .add_relationship_pipeline(includes_pipeline(), INCLUDES)
+            .add_relationship_pipeline(satisfies_pipeline(), SATISFIES)
+            .add_relationship_pipeline(requires_pipeline(), REQUIRES)
+            .add_relationship_pipeline(teaches_pipeline(), TEACHES)
+        )
+        await scheduler.run()
+        IcebergClient().log_read_latencies()
+        CypherTemplateRegistry.log_statistics()
+        CheckpointJournal.log_skipped_rows()
+
+        # only a complete load into the database moves the incremental watermark
+        if DeadLetterStore.count_stored():
+            logging.error(f"{DeadLetterStore.count_stored()} batches failed and were dead-lettered to "
+                          f"{DeadLetterStore.DIRECTORY}, the ingested snapshots are not recorded")
+        elif writes_to_neo4j and await BlueGreenDeployment.publish():
+            IcebergClient().commit_snapshot_ids()
+            CheckpointJournal.reset()
 
     finally:
 
-        await Neo4jClient.disconnect()
+        Instrumentation.export()
+        IntegrityReport.export()
+        PipelineProfiler.export()
+        CheckpointJournal.close()
+        await WriteSinkClient.close()
+        if writes_to_neo4j:
+            await Neo4jClient.disconnect()
 
     logging.info(f"Time taken: {time.perf_counter() - start:.2f} seconds")
 
 
+async def replay_dead_letters():
+    logging.info(f"Replaying the dead letters in {DeadLetterStore.DIRECTORY}...")
+    start = time.perf_counter()
+    await Neo4jClient.verify_connection()
+    try:
+        await DataIngestionMixin().replay_dead_letters()
+    finally:
+        await Neo4jClient.disconnect()
+    logging.info(f"Time taken: {time.perf_counter() - start:.2f} seconds")
+
+
+async def rollback():
+    logging.info(f"Rolling {BlueGreenDeployment.ALIAS} back to the previous database...")
+    await Neo4jClient.verify_connection()
+    try:
+        await BlueGreenDeployment.rollback()
+    finally:
+        await Neo4jClient.disconnect()
+
+
+async def replay(path: Path):
+    logging.info(f"Replaying {path}...")
+    start = time.perf_counter()
+    await Neo4jClient.verify_connection()
+    try:
+        await CypherDumpSink.replay(path)
+    finally:
+        await Neo4jClient.disconnect()
+    logging.info(f"Time taken: {time.perf_counter() - start:.2f} seconds")
+
 if __name__ == '__main__':
-    asyncio.run(main())
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--profile", nargs="?", const="profiles", default=None, type=Path, metavar="DIRECTORY",
+                        help="write cProfile and tracemalloc reports per pipeline into DIRECTORY")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run, skipping the batches its checkpoint journal recorded")
+    parser.add_argument("--replay", type=Path, metavar="DUMP",
+                        help="execute the statements of a cypher dump against Neo4j instead of ingesting")
+    parser.add_argument("--replay-dead-letters", action="store_true",
+                        help="execute the dead-lettered batches against Neo4j instead of ingesting")
+    parser.add_argument("--rollback", action="store_true",
+                        help="point the blue/green alias back at the database it served before the last load")
+    arguments: argparse.Namespace = parser.parse_args()
+    if arguments.rollback:
+        asyncio.run(rollback())
+    elif arguments.replay_dead_letters:
+        asyncio.run(replay_dead_letters())
+    elif arguments.replay:
+        asyncio.run(replay(arguments.replay))
+    else:
+        asyncio.run(main(arguments.profile, arguments.resume))
@@ -16,9 +16,11 @@ class StageType(UpperStrEnum):
     LOAD = auto()
     RENAME = auto()
     CAST = auto()
+    FILTER = auto()
     PARTITION = auto()
     INGEST = auto()
     STORE = auto()
+    SCHEMA = auto()
 
 class ComponentType(StrEnum):
     NODE: str = auto()
@@ -47,4 +49,76 @@ class ComponentName(StrEnum):
 
 class FileIOType(UpperStrEnum):
     S3 = auto()
-    LOCAL = auto()
\ No newline at end of file
+    LOCAL = auto()
+
+
+class IngestionMode(UpperStrEnum):
+    FULL = auto()
+    INCREMENTAL = auto()
+
+
+class ChangeType(UpperStrEnum):
+    UPSERT = auto()
+    DELETE = auto()
+
+
+class DatabaseBackendType(UpperStrEnum):
+    NEOMODEL = auto()
+    DRIVER = auto()
+
+
+class DatabaseClearMode(UpperStrEnum):
+    DELETE = auto()
+    RECREATE = auto()
+
+
+class DatabaseDeploymentMode(UpperStrEnum):
+    IN_PLACE = auto()
+    BLUE_GREEN = auto()
+
+
+class SchemaIndexType(UpperStrEnum):
+    UNIQUENESS_CONSTRAINT = auto()
+    RANGE_INDEX = auto()
+
+
+class PipelineExecutionMode(UpperStrEnum):
+    BATCH = auto()
+    STREAMING = auto()
+
+
+class CypherParameterEncoding(UpperStrEnum):
+    ROW = auto()
+    COLUMNAR = auto()
+
+
+class CypherTemplateType(UpperStrEnum):
+    CREATE_NODES = auto()
+    MERGE_NODES = auto()
+    DELETE_NODES = auto()
+    CREATE_RELATIONSHIPS = auto()
+    MERGE_RELATIONSHIPS = auto()
+    DELETE_RELATIONSHIPS = auto()
+
+
+class MetricScope(UpperStrEnum):
+    PIPELINE = auto()
+    STAGE = auto()
+    STEP = auto()
+
+
+class WriteSinkType(UpperStrEnum):
+    NEO4J = auto()
+    MEMORY = auto()
+    CYPHER_DUMP = auto()
+    ADMIN_IMPORT = auto()
+
+
+class AdminImportFormat(UpperStrEnum):
+    CSV = auto()
+    PARQUET = auto()
+
+
+class RelationshipIngestionStrategy(UpperStrEnum):
+    CLIENT_PARTITIONED = auto()
+    SERVER_BATCHED = auto()
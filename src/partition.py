@@ -1,44 +1,50 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
-from src.configurations import RelationshipConfiguration
+from src.configurations import RelationshipConfiguration, ApplicationConfiguration
+from src.models.enums import RelationshipIngestionStrategy
 
 
 class DataPartitionMixin:
 
-    async def generate_partition_uid(self, df: pd.DataFrame,
-                                     configuration: RelationshipConfiguration) -> pd.DataFrame:
-
-        df["partition_uid"] = df.apply(
-            lambda row: "-".join([
-                row[configuration.source_node.labeled_index_column()][-1],
-                row[configuration.destination_node.labeled_index_column()][-1]
-            ]),
-            axis=1
-        )
-
-        return df
-
-    async def filter_by_partition(self, df: pd.DataFrame, partition_set: list[str]) -> pd.DataFrame:
-        return df[df["partition_uid"].isin(partition_set)]
-
-    async def generate_partitions_and_batches(self, partition_size: int) -> list[list[str]]:
-        batches: list[list[str]] = []
-        for i in range(partition_size):
-            partitions: list[str] = []
-            for j in range(partition_size):
-                k: int = (i + j) % partition_size
-                row, col = format(k, 'x'), format(j, 'x') # to hex
-                partitions.append(str(row) + '-' + str(col))
-            batches.append(partitions)
-        return batches
-
-    async def partition(self, df: pd.DataFrame) -> list[pd.DataFrame]:
-
-        batches: list[list[str]] = await self.generate_partitions_and_batches(16)
-
-        partitions: list[pd.DataFrame] = []
-        for index, partition_set in enumerate(batches):
-            batch: pd.DataFrame = await self.filter_by_partition(df, partition_set)
-            partitions.append(batch)
-
-        return partitions
+    async def generate_partition_uid(self, df: pa.Table,
+                                     configuration: RelationshipConfiguration) -> pa.Table:
+        if configuration.ingestion_strategy == RelationshipIngestionStrategy.SERVER_BATCHED:
+            # the server batches and parallelizes the writes itself, so everything goes into a single partition
+            return df.append_column("partition_uid", pa.array(np.zeros(df.num_rows, dtype=np.int64)))
+        number_of_partitions: int = ApplicationConfiguration.NUMBER_OF_PARTITIONS
+
+        source_partition: np.ndarray = await self.hash_partition(
+            df[configuration.source_node.labeled_index_column()], number_of_partitions)
+        destination_partition: np.ndarray = await self.hash_partition(
+            df[configuration.destination_node.labeled_index_column()], number_of_partitions)
+
+        # the round is the wrap-around diagonal of the cell, so cells of one round never share a source or destination
+        partition_round: np.ndarray = (source_partition - destination_partition) % number_of_partitions
+        return df.append_column("partition_uid", pa.array(partition_round * number_of_partitions + destination_partition))
+
+    async def hash_partition(self, column: pa.ChunkedArray, number_of_partitions: int) -> np.ndarray:
+        # only the key column leaves Arrow, since pyarrow has no stable hash kernel
+        hashes: np.ndarray = pd.util.hash_array(column.to_numpy(zero_copy_only=False))
+        return (hashes % np.uint64(number_of_partitions)).astype(np.int64)
+
+    async def partition(self, df: pa.Table) -> list[list[pa.Table]]:
+        if df.num_rows == 0:
+            return []
+
+        number_of_partitions: int = ApplicationConfiguration.NUMBER_OF_PARTITIONS
+        partition_uids: np.ndarray = df["partition_uid"].to_numpy()
+        order: np.ndarray = np.argsort(partition_uids, kind="stable")
+        df = df.take(order)
+        partition_uids = partition_uids[order]
+
+        boundaries: np.ndarray = np.flatnonzero(np.diff(partition_uids)) + 1
+        starts: np.ndarray = np.concatenate(([0], boundaries))
+        ends: np.ndarray = np.concatenate((boundaries, [df.num_rows]))
+
+        rounds: list[list[pa.Table]] = [[] for _ in range(number_of_partitions)]
+        for start, end in zip(starts, ends):
+            rounds[partition_uids[start] // number_of_partitions].append(df.slice(start, end - start))
+
+        return [partitions for partitions in rounds if partitions]
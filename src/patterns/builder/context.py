@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PipelineContext:
+    pipeline_name: str
+    fingerprint: str | None = None
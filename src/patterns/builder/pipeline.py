@@ -1,27 +1,79 @@
+import asyncio
 import logging
 
-import pandas as pd
+import pyarrow as pa
 
+from src.configurations import ApplicationConfiguration
+from src.instrumentation import Instrumentation
+from src.models.enums import PipelineExecutionMode, MetricScope
+from src.patterns.builder.context import PipelineContext
 from src.patterns.builder.stage import PipelineStage
+from src.profiling import PipelineProfiler
 
 
 class Pipeline:
     def __init__(self,
                  name: str,
                  stages: list[PipelineStage] | None = None,
-                 data: pd.DataFrame | None = None,
+                 data: pa.Table | None = None,
                  ):
         self.name: str = name
         self.stages: list[PipelineStage] = stages if stages is not None else []
-        self.data: pd.DataFrame | list[pd.DataFrame] | None = data.copy() if data is not None else None
+        self.data: pa.Table | list[pa.Table] | None = data
 
-    async def run(self) -> pd.DataFrame | list[pd.DataFrame] | None:
+    async def run(self) -> pa.Table | list[pa.Table] | None:
         logging.info(f"Pipeline: {repr(self)} started...")
-        for stage in self.stages:
-            self.data: pd.DataFrame | list[pd.DataFrame] = await stage.run(self.data)
+        async with Instrumentation.measure(MetricScope.PIPELINE, self.name, self.data) as measurement:
+            if PipelineProfiler.is_enabled():
+                await PipelineProfiler.profile(self.name, self.run_stages())
+                PipelineProfiler.take_snapshot(self.name)
+            else:
+                await self.run_stages()
+            measurement.output = self.data
         logging.info(f"Pipeline: {repr(self)} finished.")
         return self.data
 
+    async def run_stages(self):
+        if ApplicationConfiguration.PIPELINE_EXECUTION_MODE == PipelineExecutionMode.STREAMING:
+            await self.run_streaming()
+            return
+        context: PipelineContext = PipelineContext(pipeline_name=self.name)
+        for stage in self.stages:
+            self.data: pa.Table | list[pa.Table] = await stage.run(self.data, context)
+
+    async def run_streaming(self):
+        streamed_stages: list[PipelineStage] = []
+        for stage in self.stages:
+            if stage.is_streamable():
+                streamed_stages.append(stage)
+                continue
+            await self.stream(streamed_stages)
+            streamed_stages = []
+            self.data = await stage.run(None)
+        await self.stream(streamed_stages)
+
+    async def stream(self, stages: list[PipelineStage]):
+        if not stages:
+            return
+        queues: list[asyncio.Queue] = [asyncio.Queue(maxsize=ApplicationConfiguration.PIPELINE_STREAM_QUEUE_SIZE)
+                                       for _ in stages[1:]]
+        tasks: list[asyncio.Task] = [
+            asyncio.create_task(stage.stream(
+                input_queue=queues[index - 1] if index > 0 else None,
+                output_queue=queues[index] if index < len(queues) else None
+            ))
+            for index, stage in enumerate(stages)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # a failed stage stops consuming, so the stages feeding it would block on a full queue forever
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        self.data = None
+
     def add_stage(self, stage: PipelineStage) -> 'Pipeline':
         self.stages.append(stage)
         return self
@@ -1,11 +1,19 @@
+import asyncio
 import logging
+from typing import AsyncIterator
 
-import pandas as pd
+import pyarrow as pa
 
-from src.models.enums import StageType
+from src.cache import StepCache
+from src.instrumentation import Instrumentation
+from src.models.enums import StageType, MetricScope
+from src.patterns.builder.context import PipelineContext
 from src.patterns.builder.step import PipelineStep
 
 
+END_OF_STREAM: object = object()
+
+
 class PipelineStage:
     def __init__(self,
                  name: str,
@@ -16,13 +24,50 @@ class PipelineStage:
         self.stage_type: StageType = stage_type
         self.steps: list[PipelineStep] | None = steps if steps is not None else []
 
-    async def run(self, data: pd.DataFrame) -> pd.DataFrame | list[pd.DataFrame]:
+    async def run(self, data: pa.Table, context: PipelineContext | None = None) -> pa.Table | list[pa.Table]:
         logging.info(f"Stage: {repr(self)} started...")
-        for step in self.steps:
-            data: pd.DataFrame | list[pd.DataFrame] = await step.run(data)
+        async with Instrumentation.measure(MetricScope.STAGE, self.name, data) as measurement:
+            for step in self.steps:
+                if context is not None and StepCache.is_cacheable(self.stage_type):
+                    data: pa.Table | list[pa.Table] = await step.run_cached(data, context)
+                else:
+                    data: pa.Table | list[pa.Table] = await step.run(data)
+                    if context is not None:
+                        context.fingerprint = None
+            measurement.output = data
         logging.info(f"Stage: {repr(self)} finished.")
         return data
 
+    async def stream(self, input_queue: asyncio.Queue | None, output_queue: asyncio.Queue | None):
+        logging.info(f"Stage: {repr(self)} started streaming...")
+        steps: list[PipelineStep] = self.steps
+        if input_queue is None:
+            chunks: AsyncIterator[pa.Table] = self.steps[0].stream()
+            steps = self.steps[1:]
+        else:
+            chunks: AsyncIterator[pa.Table] = self.drain(input_queue)
+
+        number_of_chunks: int = 0
+        async with Instrumentation.measure(MetricScope.STAGE, self.name):
+            async for chunk in chunks:
+                for step in steps:
+                    chunk: pa.Table | list[pa.Table] | None = await step.run(chunk)
+                number_of_chunks += 1
+                if output_queue is not None:
+                    await output_queue.put(chunk)
+            if output_queue is not None:
+                await output_queue.put(END_OF_STREAM)
+        logging.info(f"Stage: {repr(self)} finished streaming {number_of_chunks} chunks.")
+
+    @staticmethod
+    async def drain(queue: asyncio.Queue) -> AsyncIterator[pa.Table]:
+        while (chunk := await queue.get()) is not END_OF_STREAM:
+            yield chunk
+
+    def is_streamable(self) -> bool:
+        # schema stages run once per pipeline, between the streamed stages
+        return self.stage_type != StageType.SCHEMA
+
     def add_step(self, step: PipelineStep) -> 'PipelineStage':
         self.steps.append(step)
         return self
@@ -1,14 +1,23 @@
 import logging
+from typing import AsyncIterator
 
-import pandas as pd
+import pyarrow as pa
 
+from src.cache import StepCache, CachedResult
 from src.ingestion import DataIngestionMixin
+from src.instrumentation import Instrumentation
+from src.integrity import DataIntegrityMixin
+from src.models.enums import MetricScope
 from src.partition import DataPartitionMixin
+from src.patterns.builder.context import PipelineContext
+from src.profiling import PipelineProfiler
+from src.schema import DataSchemaMixin
 from src.storage import DataStorageMixin
 from src.transformation import DataTransformationMixin
 
 
-class PipelineStep(DataTransformationMixin, DataPartitionMixin, DataIngestionMixin, DataStorageMixin):
+class PipelineStep(DataTransformationMixin, DataIntegrityMixin, DataPartitionMixin, DataIngestionMixin, DataStorageMixin,
+                   DataSchemaMixin):
     def __init__(self, name: str, function: callable, *args, **kwargs):
         super().__init__()
         self.name: str = name
@@ -16,15 +25,61 @@ class PipelineStep(DataTransformationMixin, DataPartitionMixin, DataIngestionMix
         self.args = args
         self.kwargs = kwargs
 
-    async def run(self, data: pd.DataFrame | list[pd.DataFrame] | None = None) -> pd.DataFrame:
+    async def run(self, data: pa.Table | list[pa.Table] | CachedResult | None = None) -> pa.Table:
         logging.info(f"Executing step: {repr(self)}...")
-        if data is None:
-            data = await self.function(self, *self.args, **self.kwargs)
-        else:
-            data = await self.function(self, df=data, *self.args, **self.kwargs)
+        if isinstance(data, CachedResult):
+            data = await StepCache.load(data.key)
+        async with Instrumentation.measure(MetricScope.STEP, self.name, data) as measurement:
+            with PipelineProfiler.track_step_memory(self.name):
+                if data is None:
+                    measurement.output = await self.function(self, *self.args, **self.kwargs)
+                else:
+                    measurement.output = await self.function(self, df=data, *self.args, **self.kwargs)
         logging.info(f"Finished executing step: {repr(self)}.")
+        return measurement.output
+
+    async def run_cached(self, data: pa.Table | list[pa.Table] | CachedResult | None,
+                         context: PipelineContext) -> pa.Table | list[pa.Table] | CachedResult | None:
+        fingerprint: str | None = await self.fingerprint() if data is None else context.fingerprint
+        if fingerprint is None:
+            context.fingerprint = None
+            return await self.run(data)
+
+        key: str = StepCache.generate_key(fingerprint, self.function, self.args, self.kwargs)
+        if StepCache.contains(key):
+            logging.info(f"Reusing cached result of step: {repr(self)}")
+            context.fingerprint = key
+            # the result is only read from disk once a later step needs it
+            return CachedResult(key)
+
+        data = await self.run(data)
+        if isinstance(data, pa.Table):
+            await StepCache.store(key, data)
+            context.fingerprint = key
+        else:
+            context.fingerprint = None
         return data
 
+    async def stream(self) -> AsyncIterator[pa.Table]:
+        stream_function: callable = getattr(self, f"stream_{self.function.__name__}", None)
+        if stream_function is None:
+            yield await self.run()
+            return
+        chunks: AsyncIterator[pa.Table] = stream_function(*self.args, **self.kwargs)
+        while True:
+            async with Instrumentation.measure(MetricScope.STEP, self.name) as measurement:
+                with PipelineProfiler.track_step_memory(self.name):
+                    measurement.output = await anext(chunks, None)
+            if measurement.output is None:
+                break
+            yield measurement.output
+
+    async def fingerprint(self) -> str | None:
+        fingerprint_function: callable = getattr(self, f"fingerprint_{self.function.__name__}", None)
+        if fingerprint_function is None:
+            return None
+        return await fingerprint_function(*self.args, **self.kwargs)
+
     def __repr__(self):
         return f"PipelineStep(name={self.name!r}, function={self.function.__name__})"
 
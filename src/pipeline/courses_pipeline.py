@@ -1,3 +1,5 @@
+import pyarrow as pa
+
 from src.configurations import NodeConfiguration, COURSES
 from src.models.enums import StageType
 from src.patterns.builder.pipeline import Pipeline
@@ -8,6 +10,19 @@ from src.patterns.builder.step import PipelineStep
 def courses_pipeline():
     return (
         Pipeline(name='courses-pipeline')
+        .add_stage(
+            PipelineStage(
+                name='bootstrap-schema',
+                stage_type=StageType.SCHEMA
+            )
+            .add_step(
+                PipelineStep(
+                    name='create-courses-uid-constraint',
+                    function=PipelineStep.create_constraint,
+                    configuration=COURSES
+                )
+            )
+        )
         .add_stage(
             PipelineStage(
                 name='load-data',
@@ -43,8 +58,9 @@ def courses_pipeline():
                 PipelineStep(
                     name='cast-uuid-column-to-string',
                     function=PipelineStep.cast,
-                    column='uid',
-                    data_type=str
+                    column_types={
+                        'uid': pa.string()
+                    }
                 )
             )
         )
@@ -61,4 +77,24 @@ def courses_pipeline():
                 )
             )
         )
+        .add_stage(
+            PipelineStage(
+                name='index-data',
+                stage_type=StageType.SCHEMA
+            )
+            .add_step(
+                PipelineStep(
+                    name='create-courses-uid-index',
+                    function=PipelineStep.create_index,
+                    configuration=COURSES
+                )
+            )
+            .add_step(
+                PipelineStep(
+                    name='await-courses-uid-index',
+                    function=PipelineStep.await_index,
+                    configuration=COURSES
+                )
+            )
+        )
     )
@@ -1,3 +1,5 @@
+import pyarrow as pa
+
 from src.configurations import CURRICULA
 from src.models.enums import StageType
 from src.patterns.builder.pipeline import Pipeline
@@ -8,6 +10,19 @@ from src.patterns.builder.step import PipelineStep
 def curricula_pipeline():
     return (
         Pipeline(name='curricula-pipeline')
+        .add_stage(
+            PipelineStage(
+                name='bootstrap-schema',
+                stage_type=StageType.SCHEMA
+            )
+            .add_step(
+                PipelineStep(
+                    name='create-curricula-uid-constraint',
+                    function=PipelineStep.create_constraint,
+                    configuration=CURRICULA
+                )
+            )
+        )
         .add_stage(
             PipelineStage(
                 name='load-data',
@@ -43,8 +58,9 @@ def curricula_pipeline():
                 PipelineStep(
                     name='cast-uuid-column-to-string',
                     function=PipelineStep.cast,
-                    column='uid',
-                    data_type=str
+                    column_types={
+                        'uid': pa.string()
+                    }
                 )
             )
         )
@@ -61,4 +77,24 @@ def curricula_pipeline():
                 )
             )
         )
+        .add_stage(
+            PipelineStage(
+                name='index-data',
+                stage_type=StageType.SCHEMA
+            )
+            .add_step(
+                PipelineStep(
+                    name='create-curricula-uid-index',
+                    function=PipelineStep.create_index,
+                    configuration=CURRICULA
+                )
+            )
+            .add_step(
+                PipelineStep(
+                    name='await-curricula-uid-index',
+                    function=PipelineStep.await_index,
+                    configuration=CURRICULA
+                )
+            )
+        )
     )
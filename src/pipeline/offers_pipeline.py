@@ -1,3 +1,5 @@
+import pyarrow as pa
+
 from src.configurations import OFFERS
 from src.models.enums import StageType
 from src.patterns.builder.pipeline import Pipeline
@@ -41,26 +43,26 @@ def offers_pipeline():
             )
             .add_step(
                 PipelineStep(
-                    name='cast-uuid-column-to-string',
+                    name='cast-id-columns-to-string',
                     function=PipelineStep.cast,
-                    column='uid',
-                    data_type=str
+                    column_types={
+                        'uid': pa.string(),
+                        'study_program_id': pa.string(),
+                        'curriculum_id': pa.string()
+                    }
                 )
             )
-            .add_step(
-                PipelineStep(
-                    name='cast-study-program-id-column-to-string',
-                    function=PipelineStep.cast,
-                    column='study_program_id',
-                    data_type=str
-                )
+        )
+        .add_stage(
+            PipelineStage(
+                name='filter-data',
+                stage_type=StageType.FILTER
             )
             .add_step(
                 PipelineStep(
-                    name='cast-curriculum-id-column-to-string',
-                    function=PipelineStep.cast,
-                    column='curriculum_id',
-                    data_type=str
+                    name='prefilter-offers-data',
+                    function=PipelineStep.prefilter_relationships,
+                    configuration=OFFERS
                 )
             )
         )
@@ -1,3 +1,5 @@
+import pyarrow as pa
+
 from src.configurations import SATISFIES
 from src.models.enums import StageType
 from src.patterns.builder.pipeline import Pipeline
@@ -41,26 +43,26 @@ def satisfies_pipeline():
             )
             .add_step(
                 PipelineStep(
-                    name='cast-uuid-column-to-string',
+                    name='cast-id-columns-to-string',
                     function=PipelineStep.cast,
-                    column='uid',
-                    data_type=str
+                    column_types={
+                        'uid': pa.string(),
+                        'course_id': pa.string(),
+                        'requisite_id': pa.string()
+                    }
                 )
             )
-            .add_step(
-                PipelineStep(
-                    name='cast-course-id-column-to-string',
-                    function=PipelineStep.cast,
-                    column='course_id',
-                    data_type=str
-                )
+        )
+        .add_stage(
+            PipelineStage(
+                name='filter-data',
+                stage_type=StageType.FILTER
             )
             .add_step(
                 PipelineStep(
-                    name='cast-requisite-id-column-to-string',
-                    function=PipelineStep.cast,
-                    column='requisite_id',
-                    data_type=str
+                    name='prefilter-satisfies-data',
+                    function=PipelineStep.prefilter_relationships,
+                    configuration=SATISFIES
                 )
             )
         )
@@ -0,0 +1,198 @@
+import asyncio
+import cProfile
+import logging
+import pstats
+import re
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Any, Awaitable, Callable, Coroutine, Generator, Iterator
+
+from src.configurations import ApplicationConfiguration
+from src.instrumentation import current_pipeline
+
+
+class ProfiledAwaitable:
+    def __init__(self, coroutine: Coroutine, profile: cProfile.Profile):
+        self.coroutine: Coroutine = coroutine
+        self.profile: cProfile.Profile = profile
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        # the profile is only enabled while this coroutine runs, never while the event loop runs other pipelines
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            self.profile.enable()
+            try:
+                yielded: Any = self.coroutine.throw(error) if error is not None else self.coroutine.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as exception:
+                value, error = None, exception
+
+
+class PipelineProfiler:
+    PROFILE_DIRECTORY: Path | None = None
+    TRACEMALLOC_FRAMES: int = ApplicationConfiguration.PROFILE_TRACEMALLOC_FRAMES
+    SAMPLING_INTERVAL_IN_SECONDS: float = 0.05
+    TOP_ALLOCATIONS: int = 25
+    _profiles: dict[str, cProfile.Profile] = {}
+    _runners: dict[str, Callable[[Awaitable], Coroutine]] = {}
+    _markers: dict[str, str] = {}
+    _samples: dict[tuple[str, str], int] = {}
+    _sampler_stopped: threading.Event = threading.Event()
+    _step_peaks: dict[str, dict[str, int]] = {}
+    _running_steps: dict[tuple[str, str], int] = {}
+    _peak_lock: threading.RLock = threading.RLock()
+    _peak_pipeline: str | None = None
+    _peak_traced_memory: int = 0
+    _peak_snapshot: tracemalloc.Snapshot | None = None
+
+    @classmethod
+    def enable(cls, directory: Path):
+        cls.PROFILE_DIRECTORY = directory
+        tracemalloc.start(cls.TRACEMALLOC_FRAMES)
+        asyncio.get_running_loop().set_task_factory(cls.create_task)
+        threading.Thread(target=cls.sample, args=(threading.get_ident(),), daemon=True).start()
+        logging.info(f"Profiling pipelines into {directory}")
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls.PROFILE_DIRECTORY is not None
+
+    @classmethod
+    def create_task(cls, loop: asyncio.AbstractEventLoop, coroutine: Coroutine, **kwargs) -> asyncio.Task:
+        # tasks spawned by a pipeline, e.g. the concurrent transactions of a step, belong to that pipeline
+        pipeline: str | None = current_pipeline.get()
+        if pipeline is not None:
+            coroutine = cls.profile(pipeline, coroutine)
+        return asyncio.Task(coroutine, loop=loop, **kwargs)
+
+    @classmethod
+    def profile(cls, pipeline: str, coroutine: Coroutine) -> Coroutine:
+        if pipeline not in cls._profiles:
+            cls._profiles[pipeline] = cProfile.Profile()
+            cls._runners[pipeline] = cls.create_runner(pipeline)
+            cls._markers[cls.generate_marker(pipeline)] = pipeline
+        return cls._runners[pipeline](ProfiledAwaitable(coroutine, cls._profiles[pipeline]))
+
+    @staticmethod
+    def create_runner(pipeline: str) -> Callable[[Awaitable], Coroutine]:
+        async def run(awaitable: Awaitable) -> Any:
+            return await awaitable
+
+        # every frame of the pipeline has this frame below it, which tells the pipelines apart in the sampled stacks
+        run.__code__ = run.__code__.replace(co_filename=PipelineProfiler.generate_marker(pipeline))
+        return run
+
+    @staticmethod
+    def generate_marker(pipeline: str) -> str:
+        return f"<pipeline {pipeline}>"
+
+    @classmethod
+    def sample(cls, thread_id: int):
+        while not cls._sampler_stopped.wait(cls.SAMPLING_INTERVAL_IN_SECONDS):
+            frame: FrameType | None = sys._current_frames().get(thread_id)
+            stack: list[str] = []
+            while frame is not None and frame.f_code.co_filename not in cls._markers:
+                if frame.f_code is not ProfiledAwaitable.__await__.__code__:
+                    stack.append(f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:"
+                                 f"{frame.f_code.co_firstlineno})")
+                frame = frame.f_back
+            if frame is not None and stack:
+                key: tuple[str, str] = (cls._markers[frame.f_code.co_filename], ";".join(reversed(stack)))
+                cls._samples[key] = cls._samples.get(key, 0) + 1
+            cls.collect_peak()
+
+    @classmethod
+    @contextmanager
+    def track_step_memory(cls, step: str) -> Iterator[None]:
+        if not cls.is_enabled():
+            yield
+            return
+        key: tuple[str, str] = (current_pipeline.get(), step)
+        with cls._peak_lock:
+            # whatever was traced before the step started is not credited to it
+            cls.collect_peak()
+            cls._running_steps[key] = cls._running_steps.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with cls._peak_lock:
+                cls.collect_peak()
+                cls._running_steps[key] -= 1
+                if not cls._running_steps[key]:
+                    del cls._running_steps[key]
+
+    @classmethod
+    def collect_peak(cls):
+        # the peak is only reset here, once it was credited to every step that ran since the previous reset
+        with cls._peak_lock:
+            if not tracemalloc.is_tracing():
+                return
+            peak: int = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            for pipeline, step in cls._running_steps:
+                step_peaks: dict[str, int] = cls._step_peaks.setdefault(pipeline, {})
+                step_peaks[step] = max(step_peaks.get(step, 0), peak)
+
+    @classmethod
+    def take_snapshot(cls, pipeline: str):
+        # only the snapshot at the end of the pipeline with the highest traced memory is kept for the export
+        traced_memory: int = tracemalloc.get_traced_memory()[0]
+        if traced_memory <= cls._peak_traced_memory:
+            return
+        cls._peak_pipeline = pipeline
+        cls._peak_traced_memory = traced_memory
+        cls._peak_snapshot = tracemalloc.take_snapshot()
+
+    @classmethod
+    def export(cls):
+        if not cls.is_enabled():
+            return
+        cls._sampler_stopped.set()
+        with cls._peak_lock:
+            tracemalloc.stop()
+        cls.PROFILE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        for pipeline, profile in cls._profiles.items():
+            path: Path = cls.PROFILE_DIRECTORY / re.sub(r"[^\w.-]", "_", pipeline)
+            pstats.Stats(profile).dump_stats(path.with_suffix(".prof"))
+            path.with_suffix(".collapsed").write_text("".join(
+                f"{stack} {samples}\n" for (sampled_pipeline, stack), samples in cls._samples.items()
+                if sampled_pipeline == pipeline
+            ))
+            path.with_suffix(".memory.txt").write_text(cls.format_step_peaks(pipeline))
+        (cls.PROFILE_DIRECTORY / "allocations.txt").write_text(cls.format_allocations())
+        logging.info(f"Wrote profiles of {len(cls._profiles)} pipelines to {cls.PROFILE_DIRECTORY}")
+
+    @classmethod
+    def format_step_peaks(cls, pipeline: str) -> str:
+        lines: list[str] = ["Peak traced memory of the whole process, including the pipelines running concurrently, "
+                            "while each step of this pipeline ran:", ""]
+        for step, peak in cls._step_peaks.get(pipeline, {}).items():
+            lines.append(f"{step}: {peak / 2 ** 20:.1f} MiB")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def format_allocations(cls) -> str:
+        if cls._peak_snapshot is None:
+            return ""
+        lines: list[str] = [f"Traced memory of the whole process, all pipelines included, when {cls._peak_pipeline} "
+                            f"ended: {cls._peak_traced_memory / 2 ** 20:.1f} MiB", ""]
+        # modules imported lazily during the run would otherwise top the list
+        snapshot: tracemalloc.Snapshot = cls._peak_snapshot.filter_traces([
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+        for index, statistic in enumerate(snapshot.statistics("lineno")[:cls.TOP_ALLOCATIONS], start=1):
+            frame: tracemalloc.Frame = statistic.traceback[0]
+            lines.append(f"#{index}: {frame.filename}:{frame.lineno} {statistic.size / 2 ** 10:.1f} KiB "
+                         f"in {statistic.count} blocks")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import time
+
+from src.configurations import NodeConfiguration, RelationshipConfiguration
+from src.patterns.builder.pipeline import Pipeline
+
+
+class PipelineScheduler:
+    def __init__(self):
+        self.pipelines: dict[str, Pipeline] = {}
+        self.dependencies: dict[str, list[str]] = {}
+
+    def add_node_pipeline(self, pipeline: Pipeline, configuration: NodeConfiguration) -> 'PipelineScheduler':
+        return self.add_pipeline(configuration.label, pipeline, [])
+
+    def add_relationship_pipeline(self, pipeline: Pipeline,
+                                  configuration: RelationshipConfiguration) -> 'PipelineScheduler':
+        return self.add_pipeline(configuration.label, pipeline,
+                                 [configuration.source_node.label, configuration.destination_node.label])
+
+    def add_pipeline(self, name: str, pipeline: Pipeline, dependencies: list[str]) -> 'PipelineScheduler':
+        # dependencies have to be registered first, which keeps the graph acyclic
+        missing_dependencies: list[str] = [dependency for dependency in dependencies if dependency not in self.pipelines]
+        if missing_dependencies:
+            raise ValueError(f"Pipeline {pipeline} depends on unscheduled pipelines {missing_dependencies}")
+        self.pipelines[name] = pipeline
+        self.dependencies[name] = list(dict.fromkeys(dependencies))
+        return self
+
+    async def run(self):
+        start: float = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_pipeline(name: str):
+            await asyncio.gather(*[tasks[dependency] for dependency in self.dependencies[name]])
+            ready: float = time.perf_counter()
+            await self.pipelines[name].build().run()
+            logging.info(f"Pipeline {self.pipelines[name]} started after {ready - start:.2f} seconds "
+                         f"and ran for {time.perf_counter() - ready:.2f} seconds")
+
+        for name in self.pipelines:
+            tasks[name] = asyncio.create_task(run_pipeline(name))
+        await asyncio.gather(*tasks.values())
+
+    def __repr__(self):
+        return f"PipelineScheduler(dependencies={self.dependencies})"
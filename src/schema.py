@@ -0,0 +1,35 @@
+import pyarrow as pa
+
+from src.configurations import NodeConfiguration, ApplicationConfiguration
+from src.models.enums import SchemaIndexType, WriteSinkType
+from src.storage import Neo4jClient
+
+
+class DataSchemaMixin:
+
+    async def create_constraint(self, configuration: NodeConfiguration,
+                                df: pa.Table | None = None) -> pa.Table | None:
+        if ApplicationConfiguration.WRITE_SINK != WriteSinkType.NEO4J:
+            return df
+        if ApplicationConfiguration.SCHEMA_INDEX_TYPE == SchemaIndexType.UNIQUENESS_CONSTRAINT:
+            await Neo4jClient.create_constraint(configuration.label, configuration.index_column)
+        return df
+
+    async def create_index(self, configuration: NodeConfiguration,
+                           df: pa.Table | None = None) -> pa.Table | None:
+        if ApplicationConfiguration.WRITE_SINK != WriteSinkType.NEO4J:
+            return df
+        if ApplicationConfiguration.SCHEMA_INDEX_TYPE == SchemaIndexType.RANGE_INDEX:
+            await Neo4jClient.create_index(configuration.label, configuration.index_column)
+        return df
+
+    async def await_index(self, configuration: NodeConfiguration,
+                          df: pa.Table | None = None) -> pa.Table | None:
+        if ApplicationConfiguration.WRITE_SINK != WriteSinkType.NEO4J:
+            return df
+        if ApplicationConfiguration.SCHEMA_INDEX_TYPE == SchemaIndexType.UNIQUENESS_CONSTRAINT:
+            index_name: str = await Neo4jClient.generate_constraint_name(configuration.label, configuration.index_column)
+        else:
+            index_name: str = await Neo4jClient.generate_index_name(configuration.label, configuration.index_column)
+        await Neo4jClient.await_index(index_name)
+        return df
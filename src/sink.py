@@ -0,0 +1,241 @@
+import asyncio
+import gzip
+import json
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, IO
+
+import pyarrow as pa
+import pyarrow.csv as csv
+import pyarrow.parquet as pq
+
+from src.configurations import ApplicationConfiguration, NodeConfiguration, RelationshipConfiguration
+from src.cypher import CypherTemplate, CypherTemplateRegistry
+from src.models.enums import AdminImportFormat, CypherTemplateType, WriteSinkType
+from src.storage import Neo4jClient
+
+
+class WriteSink(ABC):
+    REQUIRES_PARAMETERS: bool = True
+    REQUIRES_PARTITIONS: bool = True
+
+    @abstractmethod
+    async def write(self, template: CypherTemplate, df: pa.Table, parameters: dict[str, Any]):
+        pass
+
+    @abstractmethod
+    async def close(self):
+        pass
+
+
+class Neo4jSink(WriteSink):
+
+    async def write(self, template: CypherTemplate, df: pa.Table, parameters: dict[str, Any]):
+        await CypherTemplateRegistry.warm_up(template)
+        await Neo4jClient.execute_cypher(template.cypher, parameters, template.auto_commit)
+
+    async def close(self):
+        pass
+
+
+class InMemorySink(WriteSink):
+
+    def __init__(self):
+        self.nodes: dict[str, dict[Any, dict[str, Any]]] = {}
+        self.relationships: dict[str, dict[tuple[Any, Any], int]] = {}
+        self.relationship_configurations: dict[str, RelationshipConfiguration] = {}
+
+    async def write(self, template: CypherTemplate, df: pa.Table, parameters: dict[str, Any]):
+        if isinstance(template.configuration, RelationshipConfiguration):
+            self.write_relationships(template.configuration, template.template_type, df)
+        else:
+            self.write_nodes(template.configuration.label, template.template_type, df)
+
+    def write_nodes(self, label: str, template_type: CypherTemplateType, df: pa.Table):
+        nodes: dict[Any, dict[str, Any]] = self.nodes.setdefault(label, {})
+        if template_type != CypherTemplateType.DELETE_NODES:
+            for row in df.to_pylist():
+                nodes.setdefault(row["uid"], {}).update(row)
+            return
+
+        uids: set[Any] = set(df["uid"].to_pylist())
+        for uid in uids:
+            nodes.pop(uid, None)
+        # deleted nodes are detached, so their relationships go with them
+        for relationship_type, configuration in self.relationship_configurations.items():
+            self.relationships[relationship_type] = {
+                (source, destination): count
+                for (source, destination), count in self.relationships[relationship_type].items()
+                if not (configuration.source_node.label == label and source in uids)
+                and not (configuration.destination_node.label == label and destination in uids)
+            }
+
+    def write_relationships(self, configuration: RelationshipConfiguration, template_type: CypherTemplateType,
+                            df: pa.Table):
+        self.relationship_configurations[configuration.label] = configuration
+        relationships: dict[tuple[Any, Any], int] = self.relationships.setdefault(configuration.label, {})
+        sources: dict[Any, dict[str, Any]] = self.nodes.get(configuration.source_node.label, {})
+        destinations: dict[Any, dict[str, Any]] = self.nodes.get(configuration.destination_node.label, {})
+        for source, destination in zip(df[configuration.source_node.labeled_index_column()].to_pylist(),
+                                       df[configuration.destination_node.labeled_index_column()].to_pylist()):
+            # both endpoints are matched first, so rows referring to a missing node write nothing
+            if source not in sources or destination not in destinations:
+                continue
+            key: tuple[Any, Any] = (source, destination)
+            if template_type == CypherTemplateType.CREATE_RELATIONSHIPS:
+                relationships[key] = relationships.get(key, 0) + 1
+            elif template_type == CypherTemplateType.MERGE_RELATIONSHIPS:
+                relationships[key] = max(relationships.get(key, 0), 1)
+            else:
+                relationships.pop(key, None)
+
+    def count_nodes(self) -> int:
+        return sum(len(nodes) for nodes in self.nodes.values())
+
+    def count_relationships(self) -> int:
+        return sum(sum(relationships.values()) for relationships in self.relationships.values())
+
+    async def close(self):
+        logging.info(f"In-memory graph holds {self.count_nodes()} nodes and {self.count_relationships()} relationships")
+
+
+class CypherDumpSink(WriteSink):
+
+    def __init__(self, path: Path = ApplicationConfiguration.CYPHER_DUMP_FILE_PATH):
+        self.path: Path = path
+        self.file: IO[str] | None = None
+        self.statements: int = 0
+
+    async def write(self, template: CypherTemplate, df: pa.Table, parameters: dict[str, Any]):
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = gzip.open(self.path, "wt", encoding="utf-8")
+        # one statement per line, written without awaiting, so concurrent batches never interleave
+        self.file.write(json.dumps({"template": template.name, "cypher": template.cypher, "parameters": parameters,
+                                    "auto_commit": template.auto_commit}, default=str) + "\n")
+        self.statements += 1
+
+    async def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        logging.info(f"Dumped {self.statements} cypher statements to {self.path}")
+
+    @staticmethod
+    async def replay(path: Path):
+        statements: int = 0
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                statement: dict[str, Any] = json.loads(line)
+                await Neo4jClient.execute_cypher(statement["cypher"], statement["parameters"],
+                                                 statement.get("auto_commit", False))
+                statements += 1
+        logging.info(f"Replayed {statements} cypher statements from {path}")
+
+
+class AdminImportSink(WriteSink):
+    REQUIRES_PARAMETERS: bool = False
+    REQUIRES_PARTITIONS: bool = False
+    NEO4J_TYPES: dict[str, Callable[[pa.DataType], bool]] = {
+        "boolean": pa.types.is_boolean,
+        "long": pa.types.is_integer,
+        "double": pa.types.is_floating,
+        "date": pa.types.is_date,
+        "localdatetime": lambda data_type: pa.types.is_timestamp(data_type) and data_type.tz is None,
+        "datetime": pa.types.is_timestamp,
+    }
+
+    def __init__(self, directory: Path = ApplicationConfiguration.ADMIN_IMPORT_DIRECTORY,
+                 file_format: AdminImportFormat = ApplicationConfiguration.ADMIN_IMPORT_FORMAT):
+        self.directory: Path = directory
+        self.file_format: AdminImportFormat = file_format
+        self.configurations: dict[str, NodeConfiguration | RelationshipConfiguration] = {}
+        self.parts: dict[str, int] = {}
+        self.rows: dict[str, int] = {}
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor()
+
+    async def write(self, template: CypherTemplate, df: pa.Table, parameters: dict[str, Any]):
+        if template.template_type not in (CypherTemplateType.CREATE_NODES, CypherTemplateType.CREATE_RELATIONSHIPS):
+            raise ValueError(f"The admin import sink only writes initial loads, not {template.template_type}")
+        label: str = template.configuration.label
+        df = df.rename_columns(self.generate_header(template.configuration, df.schema))
+        if label not in self.configurations:
+            self.configurations[label] = template.configuration
+            self.parts[label] = 0
+            self.rows[label] = 0
+            (self.directory / label).mkdir(parents=True, exist_ok=True)
+            for stale_path in (self.directory / label).glob("part-*"):
+                stale_path.unlink()
+            if self.file_format == AdminImportFormat.CSV:
+                await self.run_in_executor(csv.write_csv, df.schema.empty_table(), self.directory / label / "header.csv")
+        # every batch goes to its own part file, so batches of one label are written in parallel
+        path: Path = self.directory / label / f"part-{self.parts[label]:06d}.{self.file_format.lower()}"
+        self.parts[label] += 1
+        self.rows[label] += df.num_rows
+        if self.file_format == AdminImportFormat.CSV:
+            await self.run_in_executor(csv.write_csv, df, path, csv.WriteOptions(include_header=False))
+        else:
+            await self.run_in_executor(pq.write_table, df, path)
+
+    async def run_in_executor(self, function: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    @classmethod
+    def generate_header(cls, configuration: NodeConfiguration | RelationshipConfiguration,
+                        schema: pa.Schema) -> list[str]:
+        if isinstance(configuration, RelationshipConfiguration):
+            return [f":START_ID({configuration.source_node.label})", f":END_ID({configuration.destination_node.label})"]
+        return [f"{field.name}:ID({configuration.label})" if field.name == configuration.index_column
+                else cls.generate_property_header(field) for field in schema]
+
+    @classmethod
+    def generate_property_header(cls, field: pa.Field) -> str:
+        neo4j_type: str | None = next((neo4j_type for neo4j_type, matches in cls.NEO4J_TYPES.items()
+                                       if matches(field.type)), None)
+        return f"{field.name}:{neo4j_type}" if neo4j_type else field.name
+
+    def generate_arguments(self) -> list[str]:
+        arguments: list[str] = []
+        for label, configuration in self.configurations.items():
+            option: str = "--relationships" if isinstance(configuration, RelationshipConfiguration) else "--nodes"
+            files: list[str] = [f"{label}/header.csv"] if self.file_format == AdminImportFormat.CSV else []
+            files.append(f"{label}/part-.*\\.{self.file_format.lower()}")
+            arguments.append(f"{option}={label}={','.join(str(self.directory / file) for file in files)}")
+        if self.file_format == AdminImportFormat.PARQUET:
+            arguments.append("--input-type=parquet")
+        # relationships to missing nodes are skipped, like the MATCH of the transactional templates
+        arguments.append("--skip-bad-relationships=true")
+        return arguments
+
+    async def close(self):
+        self._executor.shutdown()
+        if not self.configurations:
+            return
+        (self.directory / "import.args").write_text("\n".join(self.generate_arguments()) + "\n")
+        for label, rows in self.rows.items():
+            logging.info(f"Wrote {rows} {label} rows in {self.parts[label]} {self.file_format} files")
+        logging.info(f"Run neo4j-admin database import full --overwrite-destination <database> "
+                     f"@{self.directory / 'import.args'} to load {self.directory}")
+
+
+class WriteSinkClient:
+    _instance: WriteSink | None = None
+
+    @classmethod
+    def connect(cls) -> WriteSink:
+        if cls._instance is None:
+            cls._instance = {
+                WriteSinkType.NEO4J: Neo4jSink,
+                WriteSinkType.MEMORY: InMemorySink,
+                WriteSinkType.CYPHER_DUMP: CypherDumpSink,
+                WriteSinkType.ADMIN_IMPORT: AdminImportSink,
+            }[ApplicationConfiguration.WRITE_SINK]()
+            logging.info(f"Writing to the {ApplicationConfiguration.WRITE_SINK} sink")
+        return cls._instance
+
+    @classmethod
+    async def close(cls):
+        if cls._instance is not None:
+            await cls._instance.close()
@@ -1,16 +1,32 @@
+import asyncio
+import json
 import logging
-from typing import Any
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, AsyncIterator
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from miniopy_async import Minio
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession, AsyncManagedTransaction, AsyncResult, ResultSummary
+from neo4j.api import AsyncBookmarkManager
 from neomodel import config
 from neomodel.async_.core import AsyncDatabase
+from neomodel.exceptions import ConstraintValidationFailed
 from pyiceberg.catalog import Catalog, load_catalog
-from pyiceberg.table import Table
+from pyiceberg.expressions import AlwaysTrue
+from pyiceberg.io.pyarrow import ArrowScan
+from pyiceberg.manifest import DataFile, DataFileContent, ManifestEntryStatus
+from pyiceberg.table import Table, FileScanTask
+from pyiceberg.table.snapshots import Snapshot, ancestors_between
 from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 
-from src.configurations import StorageConfiguration, NodeConfiguration, RelationshipConfiguration
-from src.models.enums import FileIOType
+from src.configurations import StorageConfiguration, NodeConfiguration, RelationshipConfiguration, \
+    ApplicationConfiguration
+from src.models.enums import FileIOType, IngestionMode, ChangeType, DatabaseBackendType, DatabaseClearMode
 
 
 class IcebergClient:
@@ -37,6 +53,13 @@ class IcebergClient:
                 secret_key=StorageConfiguration.S3_SECRET_KEY,
                 secure=False
             )
+        self._ingested_snapshot_ids: dict[str, int] = self.load_ingestion_state()
+        self._read_snapshot_ids: dict[str, int] = {}
+        # pyiceberg only offers blocking calls, so they run on a bounded pool instead of the event loop
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=StorageConfiguration.ICEBERG_IO_MAX_WORKERS, thread_name_prefix="iceberg-io"
+        )
+        self._read_latencies: dict[str, tuple[float, float, int]] = {}
 
     def get_catalog(self) -> Catalog:
         return self._catalog
@@ -48,40 +71,439 @@ class IcebergClient:
     def generate_table_identifier(cls, namespace: str, table_name: str) -> str:
         return f"{namespace}.{table_name}"
 
+    async def run_in_executor(self, function: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
     async def get_table(self, namespace: str, table_name: str) -> Table:
         catalog: Catalog = self.get_catalog()
         table_identifier: str = self.generate_table_identifier(namespace, table_name)
         logging.info(f"Loading table {table_identifier}")
-        return catalog.load_table(table_identifier)
+        return await self.run_in_executor(catalog.load_table, table_identifier)
 
-    async def read_data(self, dataset_configuration: NodeConfiguration | RelationshipConfiguration) -> pd.DataFrame:
+    async def read_data(self, dataset_configuration: NodeConfiguration | RelationshipConfiguration) -> pa.Table:
+        start: float = time.perf_counter()
         table: Table = await self.get_table(StorageConfiguration.ICEBERG_NAMESPACE, dataset_configuration.dataset_name)
-        return table.scan(selected_fields=tuple(dataset_configuration.input_columns())).to_pandas()
+        loaded: float = time.perf_counter()
+        data: pa.Table = await self.run_in_executor(self.scan_data, table, dataset_configuration)
+        self._read_latencies[dataset_configuration.dataset_name] = (loaded - start, time.perf_counter() - loaded,
+                                                                    data.num_rows)
+        return data
 
+    async def stream_data(self, dataset_configuration: NodeConfiguration | RelationshipConfiguration
+                          ) -> AsyncIterator[pa.Table]:
+        if self.is_incremental():
+            # changes are computed from a diff of whole snapshots, so they arrive as one chunk
+            yield await self.read_data(dataset_configuration)
+            return
 
-class Neo4jClient:
+        start: float = time.perf_counter()
+        table: Table = await self.get_table(StorageConfiguration.ICEBERG_NAMESPACE, dataset_configuration.dataset_name)
+        loaded: float = time.perf_counter()
+        snapshot_id: int | None = self.get_current_snapshot_id(table)
+        if snapshot_id is not None:
+            self._read_snapshot_ids[dataset_configuration.dataset_name] = snapshot_id
+
+        reader: pa.RecordBatchReader = await self.run_in_executor(
+            table.scan(selected_fields=tuple(dataset_configuration.input_columns())).to_arrow_batch_reader
+        )
+        scan_latency: float = time.perf_counter() - loaded
+        rows: int = 0
+        buffered_rows: int = 0
+        batches: list[pa.RecordBatch] = []
+        while True:
+            scan_start: float = time.perf_counter()
+            batch: pa.RecordBatch | None = await self.run_in_executor(self.read_next_batch, reader)
+            scan_latency += time.perf_counter() - scan_start
+            if batch is not None:
+                batches.append(batch)
+                buffered_rows += batch.num_rows
+            # record batches follow the data file layout, so they are re-cut into chunks of a bounded size
+            while buffered_rows >= ApplicationConfiguration.PIPELINE_STREAM_CHUNK_SIZE or (batch is None and buffered_rows):
+                buffered: pa.Table = pa.Table.from_batches(batches)
+                chunk: pa.Table = buffered.slice(0, ApplicationConfiguration.PIPELINE_STREAM_CHUNK_SIZE)
+                batches = buffered.slice(ApplicationConfiguration.PIPELINE_STREAM_CHUNK_SIZE).to_batches()
+                buffered_rows -= chunk.num_rows
+                rows += chunk.num_rows
+                yield chunk
+            if batch is None:
+                break
+        self._read_latencies[dataset_configuration.dataset_name] = (loaded - start, scan_latency, rows)
+
+    async def read_column(self, dataset_configuration: NodeConfiguration | RelationshipConfiguration,
+                          column: str) -> pa.ChunkedArray:
+        table: Table = await self.get_table(StorageConfiguration.ICEBERG_NAMESPACE, dataset_configuration.dataset_name)
+        # the snapshot the pipeline read is scanned again, so the column matches the ingested rows
+        snapshot_id: int | None = self._read_snapshot_ids.get(dataset_configuration.dataset_name,
+                                                              self.get_current_snapshot_id(table))
+        data: pa.Table = await self.run_in_executor(
+            table.scan(selected_fields=(column,), snapshot_id=snapshot_id).to_arrow)
+        return data[column]
+
+    @staticmethod
+    def read_next_batch(reader: pa.RecordBatchReader) -> pa.RecordBatch | None:
+        try:
+            return reader.read_next_batch()
+        except StopIteration:
+            return None
+
+    def scan_data(self, table: Table, dataset_configuration: NodeConfiguration | RelationshipConfiguration) -> pa.Table:
+        snapshot_id: int | None = self.get_current_snapshot_id(table)
+        if snapshot_id is not None:
+            self._read_snapshot_ids[dataset_configuration.dataset_name] = snapshot_id
+
+        if not self.is_incremental():
+            return table.scan(selected_fields=tuple(dataset_configuration.input_columns())).to_arrow()
+
+        ingested_snapshot_id: int | None = self._ingested_snapshot_ids.get(dataset_configuration.dataset_name)
+        if ingested_snapshot_id is None:
+            logging.info(f"No ingested snapshot recorded for {dataset_configuration.dataset_name}, reading all rows")
+            data: pa.Table = table.scan(selected_fields=tuple(dataset_configuration.input_columns())).to_arrow()
+            return self.with_change_type(data, ChangeType.UPSERT)
+        return self.read_changes(table, dataset_configuration, ingested_snapshot_id, snapshot_id)
+
+    def read_changes(self, table: Table, dataset_configuration: NodeConfiguration | RelationshipConfiguration,
+                     from_snapshot_id: int, to_snapshot_id: int | None) -> pa.Table:
+        columns: list[str] = dataset_configuration.input_columns()
+        if from_snapshot_id == to_snapshot_id or to_snapshot_id is None:
+            logging.info(f"No changes in {dataset_configuration.dataset_name} since snapshot {from_snapshot_id}")
+            return self.with_change_type(self.read_data_files(table, columns, []), ChangeType.UPSERT)
+
+        from_snapshot: Snapshot | None = table.snapshot_by_id(from_snapshot_id)
+        if from_snapshot is None:
+            logging.warning(f"Snapshot {from_snapshot_id} of {dataset_configuration.dataset_name} has expired, "
+                            f"upserting all rows without deletes")
+            data: pa.Table = table.scan(selected_fields=tuple(columns)).to_arrow()
+            return self.with_change_type(data, ChangeType.UPSERT)
+
+        data_files: tuple[list[DataFile], list[DataFile]] | None = self.get_changed_data_files(table, from_snapshot)
+        if data_files is None:
+            logging.info(f"Row-level deletes found in {dataset_configuration.dataset_name}, "
+                         f"comparing snapshots {from_snapshot_id} and {to_snapshot_id}")
+            added: pa.Table = table.scan(selected_fields=tuple(columns)).to_arrow()
+            deleted: pa.Table = table.scan(selected_fields=tuple(columns), snapshot_id=from_snapshot_id).to_arrow()
+        else:
+            added_data_files, deleted_data_files = data_files
+            logging.info(f"Reading {len(added_data_files)} added and {len(deleted_data_files)} deleted data files "
+                         f"of {dataset_configuration.dataset_name} between snapshots {from_snapshot_id} and {to_snapshot_id}")
+            added: pa.Table = self.read_data_files(table, columns, added_data_files)
+            deleted: pa.Table = self.read_data_files(table, columns, deleted_data_files)
+
+        return self.diff(table, added, deleted, dataset_configuration)
+
+    @staticmethod
+    def get_changed_data_files(table: Table, from_snapshot: Snapshot) -> tuple[list[DataFile], list[DataFile]] | None:
+        snapshots: list[Snapshot] = list(ancestors_between(from_snapshot, table.current_snapshot(), table.metadata))
+        if snapshots[-1] != from_snapshot:
+            return None
+
+        added: dict[str, DataFile] = {}
+        deleted: dict[str, DataFile] = {}
+        for snapshot in snapshots[:-1]:
+            for manifest in snapshot.manifests(table.io):
+                if manifest.added_snapshot_id != snapshot.snapshot_id:
+                    continue
+                for entry in manifest.fetch_manifest_entry(table.io, discard_deleted=False):
+                    # deleted entries may keep the id of the snapshot that added the file
+                    if entry.snapshot_id != snapshot.snapshot_id and entry.status != ManifestEntryStatus.DELETED:
+                        continue
+                    if entry.data_file.content != DataFileContent.DATA:
+                        return None
+                    if entry.status == ManifestEntryStatus.ADDED:
+                        added[entry.data_file.file_path] = entry.data_file
+                    elif entry.status == ManifestEntryStatus.DELETED:
+                        deleted[entry.data_file.file_path] = entry.data_file
+
+        return (
+            [data_file for path, data_file in added.items() if path not in deleted],
+            [data_file for path, data_file in deleted.items() if path not in added]
+        )
+
+    @staticmethod
+    def read_data_files(table: Table, columns: list[str], data_files: list[DataFile]) -> pa.Table:
+        return ArrowScan(
+            table.metadata, table.io, table.schema().select(*columns), AlwaysTrue()
+        ).to_table([FileScanTask(data_file) for data_file in data_files])
+
+    @staticmethod
+    def diff(table: Table, added: pa.Table, deleted: pa.Table,
+             dataset_configuration: NodeConfiguration | RelationshipConfiguration) -> pa.Table:
+        columns: list[str] = dataset_configuration.input_columns()
+        added = added.select(columns)
+        # an empty file list is read as large types and real files as plain ones, so the join keys are aligned first
+        deleted = deleted.select(columns).cast(added.schema).group_by(columns).aggregate([]).select(columns)
+        upserts: pa.Table = added.join(deleted, keys=columns, join_type="left anti").select(columns)
+        deletes: pa.Table = deleted.join(added, keys=columns, join_type="left anti").select(columns)
+        if isinstance(dataset_configuration, NodeConfiguration):
+            index_column: str = dataset_configuration.input_index_column()
+            deletes = deletes.filter(pc.invert(pc.is_in(deletes[index_column], value_set=upserts[index_column].combine_chunks())))
+        elif deletes.num_rows:
+            # the edge of a deleted row is shared with every other row of the same pair, so it stays while one is left
+            pair_columns: list[str] = dataset_configuration.input_pair_columns()
+            current_pairs: pa.Table = table.scan(selected_fields=tuple(pair_columns)).to_arrow()
+            deletes = deletes.join(current_pairs.select(pair_columns).cast(deletes.select(pair_columns).schema),
+                                   keys=pair_columns, join_type="left anti").select(columns)
+
+        logging.info(f"Found {upserts.num_rows} upserts and {deletes.num_rows} deletes in "
+                     f"{dataset_configuration.dataset_name}")
+        return pa.concat_tables([
+            IcebergClient.with_change_type(upserts, ChangeType.UPSERT),
+            IcebergClient.with_change_type(deletes, ChangeType.DELETE)
+        ])
+
+    @staticmethod
+    def with_change_type(data: pa.Table, change_type: ChangeType) -> pa.Table:
+        return data.append_column(ApplicationConfiguration.CHANGE_TYPE_COLUMN,
+                                  pa.repeat(change_type.value, data.num_rows))
+
+    async def get_snapshot_fingerprint(self,
+                                       dataset_configuration: NodeConfiguration | RelationshipConfiguration) -> str | None:
+        table: Table = await self.get_table(StorageConfiguration.ICEBERG_NAMESPACE, dataset_configuration.dataset_name)
+        snapshot_id: int | None = self.get_current_snapshot_id(table)
+        if snapshot_id is None:
+            return None
+        self._read_snapshot_ids[dataset_configuration.dataset_name] = snapshot_id
+        ingested_snapshot_id: int | None = self._ingested_snapshot_ids.get(dataset_configuration.dataset_name) \
+            if self.is_incremental() else None
+        return f"{table.metadata.table_uuid}:{snapshot_id}:{ingested_snapshot_id}"
+
+    def generate_snapshot_range(self, dataset_configuration: NodeConfiguration | RelationshipConfiguration,
+                                snapshot_id: int | None = None) -> str:
+        ingested_snapshot_id: int | None = self._ingested_snapshot_ids.get(dataset_configuration.dataset_name) \
+            if self.is_incremental() else None
+        if snapshot_id is None:
+            snapshot_id = self._read_snapshot_ids.get(dataset_configuration.dataset_name)
+        return f"{ingested_snapshot_id}:{snapshot_id}"
+
+    async def find_snapshot_range(self, dataset_configuration: NodeConfiguration | RelationshipConfiguration) -> str:
+        table: Table = await self.get_table(StorageConfiguration.ICEBERG_NAMESPACE, dataset_configuration.dataset_name)
+        return self.generate_snapshot_range(dataset_configuration, self.get_current_snapshot_id(table))
+
+    def log_read_latencies(self):
+        for dataset_name, (load_latency, scan_latency, rows) in sorted(
+                self._read_latencies.items(), key=lambda item: -sum(item[1][:2])):
+            logging.info(f"Read {rows} rows of {dataset_name}: loaded in {load_latency:.2f} seconds, "
+                         f"scanned in {scan_latency:.2f} seconds")
+
+    @staticmethod
+    def get_current_snapshot_id(table: Table) -> int | None:
+        snapshot: Snapshot | None = table.current_snapshot()
+        return snapshot.snapshot_id if snapshot is not None else None
+
+    @staticmethod
+    def load_ingestion_state() -> dict[str, int]:
+        if not ApplicationConfiguration.INGESTION_STATE_FILE_PATH.exists():
+            return {}
+        with ApplicationConfiguration.INGESTION_STATE_FILE_PATH.open() as file:
+            return {dataset_name: int(snapshot_id) for dataset_name, snapshot_id in json.load(file).items()}
+
+    @staticmethod
+    def reset_ingestion_state():
+        ApplicationConfiguration.INGESTION_STATE_FILE_PATH.unlink(missing_ok=True)
+        logging.info(f"Removed the recorded snapshots in {ApplicationConfiguration.INGESTION_STATE_FILE_PATH}")
+
+    def is_incremental(self) -> bool:
+        return ApplicationConfiguration.INGESTION_MODE == IngestionMode.INCREMENTAL and bool(self._ingested_snapshot_ids)
+
+    def commit_snapshot_ids(self):
+        self._ingested_snapshot_ids = {**self._ingested_snapshot_ids, **self._read_snapshot_ids}
+        path: Path = ApplicationConfiguration.INGESTION_STATE_FILE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path: Path = path.with_suffix(f"{path.suffix}.tmp")
+        with temporary_path.open("w") as file:
+            json.dump(self._ingested_snapshot_ids, file, indent=2)
+        temporary_path.replace(path)
+        logging.info(f"Recorded ingested snapshots {self._ingested_snapshot_ids} in {path}")
+
+
+class Neo4jBackend(ABC):
+
+    @abstractmethod
+    async def execute(self, cypher: str, params: dict[str, Any] | None = None) -> ResultSummary | None:
+        pass
+
+    @abstractmethod
+    async def execute_auto_commit(self, cypher: str, params: dict[str, Any] | None = None) -> ResultSummary | None:
+        pass
+
+    @abstractmethod
+    async def query(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        pass
+
+    @abstractmethod
+    async def execute_system(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        pass
+
+    @abstractmethod
+    async def use_database(self, name: str):
+        pass
+
+    @abstractmethod
+    async def drop_constraints(self):
+        pass
+
+    @abstractmethod
+    async def drop_indexes(self):
+        pass
+
+    @abstractmethod
+    async def close(self):
+        pass
+
+
+class NeomodelBackend(Neo4jBackend):
     DATABASE_URL: str = StorageConfiguration.DATABASE_CONNECTION_STRING
     DATABASE_CONNECTION_ACQUISITION_TIMEOUT: str = StorageConfiguration.DATABASE_CONNECTION_ACQUISITION_TIMEOUT
     DATABASE_CONNECTION_TIMEOUT: str = StorageConfiguration.DATABASE_CONNECTION_TIMEOUT
     DATABASE_MAX_CONNECTION_LIFETIME: str = StorageConfiguration.DATABASE_MAX_CONNECTION_LIFETIME
     DATABASE_MAX_CONNECTION_POOL_SIZE: int = StorageConfiguration.DATABASE_MAX_CONNECTION_POOL_SIZE
     DATABASE_MAX_TRANSACTION_RETRY_TIME: int = StorageConfiguration.DATABASE_MAX_TRANSACTION_RETRY_TIME
+
+    def __init__(self):
+        config.DATABASE_URL = self.DATABASE_URL
+        config.CONNECTION_ACQUISITION_TIMEOUT = self.DATABASE_CONNECTION_ACQUISITION_TIMEOUT
+        config.CONNECTION_TIMEOUT = self.DATABASE_CONNECTION_TIMEOUT
+        config.MAX_CONNECTION_LIFETIME = self.DATABASE_MAX_CONNECTION_LIFETIME
+        config.MAX_CONNECTION_POOL_SIZE = self.DATABASE_MAX_CONNECTION_POOL_SIZE
+        config.MAX_TRANSACTION_RETRY_TIME = self.DATABASE_MAX_TRANSACTION_RETRY_TIME
+        self.client: AsyncDatabase = AsyncDatabase()
+
+    async def execute(self, cypher: str, params: dict[str, Any] | None = None) -> None:
+        await self.cypher_query(cypher, params)
+
+    async def execute_auto_commit(self, cypher: str, params: dict[str, Any] | None = None) -> None:
+        # outside of a neomodel transaction every query already runs in an auto-commit transaction
+        await self.cypher_query(cypher, params)
+
+    async def query(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        return await self.cypher_query(cypher, params)
+
+    async def cypher_query(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        try:
+            results, _ = await self.client.cypher_query(cypher, params)
+        except ConstraintValidationFailed as error:
+            # neomodel turns constraint violations into ValueErrors, the ingestor handles the driver's own errors
+            raise error.__cause__ if error.__cause__ is not None else error
+        return results
+
+    async def execute_system(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        async with self.client.driver.session(database="system") as session:
+            result: AsyncResult = await session.run(cypher, params or {})
+            return await result.values()
+
+    async def use_database(self, name: str):
+        config.DATABASE_NAME = name
+        # a connection set up from a driver takes its database from the configuration instead of the url
+        await self.client.set_connection(driver=self.client.driver)
+
+    async def drop_constraints(self):
+        await self.client.drop_constraints(quiet=False)
+
+    async def drop_indexes(self):
+        await self.client.drop_indexes(quiet=False)
+
+    async def close(self):
+        await self.client.close_connection()
+
+
+class Neo4jDriverBackend(Neo4jBackend):
+
+    def __init__(self):
+        self.driver: AsyncDriver = AsyncGraphDatabase.driver(
+            StorageConfiguration.DATABASE_URI,
+            auth=(StorageConfiguration.DATABASE_USER, StorageConfiguration.DATABASE_PASSWORD),
+            connection_acquisition_timeout=StorageConfiguration.DATABASE_CONNECTION_ACQUISITION_TIMEOUT,
+            connection_timeout=StorageConfiguration.DATABASE_CONNECTION_TIMEOUT,
+            max_connection_lifetime=StorageConfiguration.DATABASE_MAX_CONNECTION_LIFETIME,
+            max_connection_pool_size=StorageConfiguration.DATABASE_MAX_CONNECTION_POOL_SIZE,
+            max_transaction_retry_time=StorageConfiguration.DATABASE_MAX_TRANSACTION_RETRY_TIME,
+        )
+        # sessions share one bookmark manager, so relationship writes always see the committed nodes
+        self.bookmark_manager: AsyncBookmarkManager = AsyncGraphDatabase.bookmark_manager()
+        self.idle_sessions: list[AsyncSession] = []
+        self.database_name: str = StorageConfiguration.DATABASE_NAME
+
+    def open_session(self) -> AsyncSession:
+        return self.driver.session(database=self.database_name, bookmark_manager=self.bookmark_manager)
+
+    async def execute(self, cypher: str, params: dict[str, Any] | None = None) -> ResultSummary:
+        session: AsyncSession = self.idle_sessions.pop() if self.idle_sessions else self.open_session()
+        try:
+            summary: ResultSummary = await session.execute_write(self.consume, cypher, params or {})
+        except Exception:
+            await session.close()
+            raise
+        self.idle_sessions.append(session)
+        return summary
+
+    async def execute_auto_commit(self, cypher: str, params: dict[str, Any] | None = None) -> ResultSummary:
+        # CALL { ... } IN TRANSACTIONS commits its own transactions, so it cannot run inside a managed one
+        async with self.open_session() as session:
+            result: AsyncResult = await session.run(cypher, params or {})
+            return await result.consume()
+
+    async def query(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        async with self.open_session() as session:
+            result: AsyncResult = await session.run(cypher, params or {})
+            return await result.values()
+
+    async def execute_system(self, cypher: str, params: dict[str, Any] | None = None) -> list[list[Any]]:
+        async with self.driver.session(database="system") as session:
+            result: AsyncResult = await session.run(cypher, params or {})
+            values: list[list[Any]] = await result.values()
+        await self.reset_sessions()
+        return values
+
+    async def use_database(self, name: str):
+        self.database_name = name
+        await self.reset_sessions()
+
+    async def reset_sessions(self):
+        for session in self.idle_sessions:
+            await session.close()
+        self.idle_sessions.clear()
+        # bookmarks of a replaced or another database would make the sessions wait for transactions it never had
+        self.bookmark_manager = AsyncGraphDatabase.bookmark_manager()
+
+    @staticmethod
+    async def consume(transaction: AsyncManagedTransaction, cypher: str, params: dict[str, Any]) -> ResultSummary:
+        result: AsyncResult = await transaction.run(cypher, params)
+        return await result.consume()
+
+    async def drop_constraints(self):
+        for name, in await self.query("SHOW CONSTRAINTS YIELD name RETURN name"):
+            await self.query(f"DROP CONSTRAINT {name} IF EXISTS")
+            logging.info(f"Dropped constraint {name}")
+
+    async def drop_indexes(self):
+        for name, in await self.query("SHOW INDEXES YIELD name, type, owningConstraint "
+                                      "WHERE type <> 'LOOKUP' AND owningConstraint IS NULL RETURN name"):
+            await self.query(f"DROP INDEX {name} IF EXISTS")
+            logging.info(f"Dropped index {name}")
+
+    async def close(self):
+        for session in self.idle_sessions:
+            await session.close()
+        self.idle_sessions.clear()
+        await self.driver.close()
+
+
+class Neo4jClient:
     _instance: 'Neo4jClient' = None
+    index_creation_times: dict[str, float] = {}
+    CLEAR_BATCHES_PER_REPORT: int = 10
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
             cls._instance = super().__new__(cls)
-            config.DATABASE_URL = cls.DATABASE_URL
-            config.CONNECTION_ACQUISITION_TIMEOUT = cls.DATABASE_CONNECTION_ACQUISITION_TIMEOUT
-            config.CONNECTION_TIMEOUT = cls.DATABASE_CONNECTION_TIMEOUT
-            config.MAX_CONNECTION_LIFETIME = cls.DATABASE_MAX_CONNECTION_LIFETIME
-            config.MAX_CONNECTION_POOL_SIZE = cls.DATABASE_MAX_CONNECTION_POOL_SIZE
-            config.MAX_TRANSACTION_RETRY_TIME = cls.DATABASE_MAX_TRANSACTION_RETRY_TIME
-            cls._instance.client = AsyncDatabase()
+            cls._instance.client = {
+                DatabaseBackendType.NEOMODEL: NeomodelBackend,
+                DatabaseBackendType.DRIVER: Neo4jDriverBackend,
+            }[StorageConfiguration.DATABASE_BACKEND]()
+            logging.info(f"Using the {StorageConfiguration.DATABASE_BACKEND} database backend")
         return cls._instance
 
     @staticmethod
-    def connect() -> AsyncDatabase:
+    def connect() -> Neo4jBackend:
         return Neo4jClient().client
 
     @staticmethod
@@ -95,8 +517,8 @@ class Neo4jClient:
     )
     async def verify_connection():
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
-            await neo4j.cypher_query('RETURN 1')
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            await neo4j.query('RETURN 1')
             logging.info(
                 f"Connected to {StorageConfiguration.DATABASE_NAME} database as user {StorageConfiguration.DATABASE_USER}")
         except Exception as e:
@@ -106,8 +528,8 @@ class Neo4jClient:
     @staticmethod
     async def disconnect():
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
-            await neo4j.close_connection()
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            await neo4j.close()
             logging.info(f"Disconnected from {StorageConfiguration.DATABASE_NAME} database")
         except Exception as e:
             logging.error(f"Disconnection failed: {e}")
@@ -115,64 +537,177 @@ class Neo4jClient:
     @staticmethod
     async def clear_database():
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
-            await neo4j.cypher_query('MATCH (n) DETACH DELETE n')
-            logging.info(f"Cleared {StorageConfiguration.DATABASE_NAME} database")
+            start: float = time.perf_counter()
+            if StorageConfiguration.DATABASE_CLEAR_MODE == DatabaseClearMode.RECREATE \
+                    and await Neo4jClient.recreate_database():
+                return
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            relationship_types: list[str] = [relationship_type for relationship_type, in await neo4j.query(
+                "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType")]
+            labels: list[str] = [label for label, in await neo4j.query("CALL db.labels() YIELD label RETURN label")]
+            # relationships of different types share nodes and would deadlock, so they are deleted one type at a time
+            await Neo4jClient.delete_in_batches({f"{relationship_type} relationships":
+                                                     f"MATCH ()-[entity:`{relationship_type}`]->()"
+                                                 for relationship_type in relationship_types}, "DELETE", concurrency=1)
+            # without relationships left the labels no longer lock each other, so they are deleted in parallel
+            await Neo4jClient.delete_in_batches({f"{label} nodes": f"MATCH (entity:`{label}`)" for label in labels},
+                                                "DETACH DELETE")
+            # nodes without a label are not covered by any label scan
+            await Neo4jClient.delete_in_batches({"remaining nodes": "MATCH (entity)"}, "DETACH DELETE")
+            logging.info(f"Cleared {StorageConfiguration.DATABASE_NAME} database "
+                         f"in {time.perf_counter() - start:.2f} seconds")
         except Exception as e:
+            # writing into a partially cleared database would duplicate its nodes, so the run stops here
             logging.error(f"Clearing database failed: {e}")
+            raise
+
+    @staticmethod
+    async def verify_server_version(minimum_version: tuple[int, int], feature: str):
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        versions: list[list[Any]] = await neo4j.query(
+            "CALL dbms.components() YIELD name, versions WHERE name = 'Neo4j Kernel' RETURN versions[0]")
+        version: str = versions[0][0] if versions else "an unknown version"
+        # 5.x releases were followed by calendar versions such as 2025.03, which compare the same way
+        if tuple(int(part) for part in re.findall(r"\d+", version)[:2]) < minimum_version:
+            raise RuntimeError(f"{feature} needs Neo4j {minimum_version[0]}.{minimum_version[1]:02d} or later, "
+                               f"the server runs {version}")
+
+    @staticmethod
+    async def recreate_database() -> bool:
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        editions: list[list[Any]] = await neo4j.query("CALL dbms.components() YIELD edition RETURN edition")
+        if not editions or editions[0][0] != "enterprise":
+            logging.warning(f"Recreating {StorageConfiguration.DATABASE_NAME} database needs the enterprise edition, "
+                            f"deleting its contents in batches instead")
+            return False
+        start: float = time.perf_counter()
+        await neo4j.execute_system(f"CREATE OR REPLACE DATABASE `{StorageConfiguration.DATABASE_NAME}` WAIT")
+        logging.info(f"Recreated {StorageConfiguration.DATABASE_NAME} database "
+                     f"in {time.perf_counter() - start:.2f} seconds")
+        return True
+
+    @staticmethod
+    async def delete_in_batches(matches: dict[str, str], delete: str,
+                                concurrency: int = StorageConfiguration.DATABASE_CLEAR_CONCURRENCY):
+        neo4j: Neo4jBackend = Neo4jClient.connect()
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+        batch_size: int = StorageConfiguration.DATABASE_CLEAR_BATCH_SIZE
+
+        async def delete_matched(name: str, match: str):
+            async with semaphore:
+                [[total]] = await neo4j.query(f"{match} RETURN count(entity)")
+                deleted: int = 0
+                # every round deletes a bounded number of batches, so progress is reported while a large label clears
+                while deleted < total:
+                    # the importing WITH keeps the subquery valid on servers older than 5.23
+                    [[count]] = await neo4j.query(
+                        f"{match} WITH entity LIMIT {batch_size * Neo4jClient.CLEAR_BATCHES_PER_REPORT} "
+                        f"CALL {{ WITH entity {delete} entity }} IN TRANSACTIONS OF {batch_size} ROWS RETURN count(*)"
+                    )
+                    if count == 0:
+                        break
+                    deleted += count
+                    logging.info(f"Deleted {deleted}/{total} {name}")
+
+        await asyncio.gather(*[delete_matched(name, match) for name, match in matches.items()])
 
     @staticmethod
     async def drop_constraints():
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
-            await neo4j.drop_constraints(quiet=False)
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            await neo4j.drop_constraints()
         except Exception as e:
             logging.error(f"Dropping constraints failed: {e}")
 
     @staticmethod
     async def drop_indices():
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
-            await neo4j.drop_indexes(quiet=False)
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            await neo4j.drop_indexes()
         except Exception as e:
             logging.error(f"Dropping indices failed: {e}")
 
     @staticmethod
-    async def execute_cypher(cypher: str, params: dict[str, Any]):
+    async def execute_cypher(cypher: str, params: dict[str, Any], auto_commit: bool = False):
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
-            await neo4j.cypher_query(cypher, params)
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            if auto_commit:
+                await neo4j.execute_auto_commit(cypher, params)
+            else:
+                await neo4j.execute(cypher, params)
             logging.info(f"Executed {cypher} cypher")
         except Exception as e:
             logging.error(f"Execute cypher failed: {e}")
+            raise
+
+    @staticmethod
+    async def explain_cypher(cypher: str, params: dict[str, Any]):
+        try:
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            await neo4j.query(f"EXPLAIN {cypher}", params)
+        except Exception as e:
+            logging.error(f"Explaining cypher failed: {e}")
 
     @staticmethod
     async def generate_index_name(label: str, column: str) -> str:
         return f"{label.lower()}_{column}_index"
 
+    @staticmethod
+    async def generate_constraint_name(label: str, column: str) -> str:
+        return f"{label.lower()}_{column}_constraint"
+
     @staticmethod
     async def create_index(label: str, column: str):
         index_name: str = await Neo4jClient.generate_index_name(label, column)
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
+            neo4j: Neo4jBackend = Neo4jClient.connect()
             cypher: str = f"""
-                CREATE INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON (n:{column})
+                CREATE INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON (n.{column})
                 """
             logging.info(f"Creating index {index_name} on label {label} and column {column}")
-            await neo4j.cypher_query(cypher)
+            await neo4j.query(cypher)
+            Neo4jClient.index_creation_times[index_name] = time.perf_counter()
+        except Exception as e:
+            logging.error(f"Creating index {index_name} on label {label} and column {column} failed: {e}")
+
+    @staticmethod
+    async def create_constraint(label: str, column: str):
+        constraint_name: str = await Neo4jClient.generate_constraint_name(label, column)
+        try:
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            cypher: str = f"""
+                CREATE CONSTRAINT {constraint_name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{column} IS UNIQUE
+                """
+            logging.info(f"Creating uniqueness constraint {constraint_name} on label {label} and column {column}")
+            await neo4j.query(cypher)
+            Neo4jClient.index_creation_times[constraint_name] = time.perf_counter()
         except Exception as e:
-            logging.error(f"Creating index {index_name} on label {label} and column {column} failed")
+            logging.error(f"Creating constraint {constraint_name} on label {label} and column {column} failed: {e}")
+
+    @staticmethod
+    async def await_index(index_name: str):
+        start: float = Neo4jClient.index_creation_times.get(index_name, time.perf_counter())
+        try:
+            neo4j: Neo4jBackend = Neo4jClient.connect()
+            logging.info(f"Waiting for index {index_name} to come online")
+            await neo4j.query("CALL db.awaitIndex($name, $timeout)", {
+                "name": index_name,
+                "timeout": StorageConfiguration.DATABASE_INDEX_AWAIT_TIMEOUT_IN_SECONDS
+            })
+            logging.info(f"Index {index_name} is ONLINE, populated in {time.perf_counter() - start:.2f} seconds")
+        except Exception as e:
+            logging.error(f"Waiting for index {index_name} failed: {e}")
 
     @staticmethod
     async def drop_index(label: str, column: str):
         index_name: str = await Neo4jClient.generate_index_name(label, column)
         try:
-            neo4j: AsyncDatabase = Neo4jClient.connect()
+            neo4j: Neo4jBackend = Neo4jClient.connect()
             cypher: str = f"""
             DROP INDEX {index_name} IF EXISTS
                 """
             logging.info(f"Dropping index  {index_name}")
-            await neo4j.cypher_query(cypher)
+            await neo4j.query(cypher)
         except Exception as e:
             logging.error(f"Dropping {index_name} index failed: {e}")
 
@@ -180,4 +715,10 @@ class Neo4jClient:
 class DataStorageMixin:
 
     def read_data(self, configuration: NodeConfiguration | RelationshipConfiguration):
-        return IcebergClient().read_data(configuration)
\ No newline at end of file
+        return IcebergClient().read_data(configuration)
+
+    def fingerprint_read_data(self, configuration: NodeConfiguration | RelationshipConfiguration):
+        return IcebergClient().get_snapshot_fingerprint(configuration)
+
+    def stream_read_data(self, configuration: NodeConfiguration | RelationshipConfiguration):
+        return IcebergClient().stream_data(configuration)
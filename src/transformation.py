@@ -1,11 +1,13 @@
-import pandas as pd
+import pyarrow as pa
 
 
 class DataTransformationMixin:
 
-    async def rename(self, df: pd.DataFrame, column_mapping: dict[str, str]) -> pd.DataFrame:
-        return df.rename(columns=column_mapping)
+    async def rename(self, df: pa.Table, column_mapping: dict[str, str]) -> pa.Table:
+        return df.rename_columns({column: column_mapping.get(column, column) for column in df.column_names})
 
-    async def cast(self, df: pd.DataFrame, column: str, data_type: type) -> pd.DataFrame:
-        df[column] = df[column].astype(data_type)
-        return df
\ No newline at end of file
+    async def cast(self, df: pa.Table, column_types: dict[str, pa.DataType]) -> pa.Table:
+        schema: pa.Schema = pa.schema([
+            field.with_type(column_types[field.name]) if field.name in column_types else field for field in df.schema
+        ])
+        return df.cast(schema)